@@ -1,16 +1,178 @@
+"""Load generator for the Recommend RPC.
+
+Closed loop: ``--concurrency`` workers each send the next request as soon as
+the previous one returns. Open loop: requests are sent at a fixed ``--qps``
+whatever the server does, and latency is measured from the scheduled send
+time so a stalled server shows up in the percentiles instead of silently
+lowering the offered load. Samples from the ``--warmup`` period are dropped.
+
+    python -m poc_grpc_microservice.client --start-server --mode open --qps 2000 --duration 10
+
+The report is printed as one JSON object.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import time
 import grpc
+from poc_grpc_microservice.recommendations.harness import percentile
 from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
 from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, RecommendationRequest
 
 
-request = RecommendationRequest(user_id=1, 
-                                category=BookCategory.SCIENCE_FICTION,
-                                max_results=1)
+def parse_mix(mix):
+    """``"MYSTERY:3,SELF_HELP:1"`` -> [(BookCategory.MYSTERY, 3.0), (BookCategory.SELF_HELP, 1.0)]"""
+    weights = []
+    for entry in mix.split(","):
+        category, _, weight = entry.partition(":")
+        weights.append((BookCategory.Value(category.strip()), float(weight or 1)))
+    return weights
+
+
+def request_generator(mix, max_results, num_users, seed=0):
+    rng = random.Random(seed)
+    categories = [category for category, _ in mix]
+    weights = [weight for _, weight in mix]
+    while True:
+        yield RecommendationRequest(
+            user_id=rng.randrange(1, num_users + 1),
+            category=rng.choices(categories, weights)[0],
+            max_results=max_results,
+        )
+
+
+class Recorder(object):
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.latencies = []
+        self.errors = {}
+
+    def record(self, scheduled_at, error=None):
+        if scheduled_at < self.measure_from:
+            return
+        if error is not None:
+            code = error.code().name
+            self.errors[code] = self.errors.get(code, 0) + 1
+        else:
+            self.latencies.append(time.perf_counter() - scheduled_at)
+
+
+async def call(client, request, timeout, recorder, scheduled_at):
+    try:
+        await client.Recommend(request, timeout=timeout)
+    except grpc.aio.AioRpcError as error:
+        recorder.record(scheduled_at, error)
+    else:
+        recorder.record(scheduled_at)
+
+
+async def closed_loop(client, requests, concurrency, timeout, recorder, stop_at):
+    async def worker():
+        while time.perf_counter() < stop_at:
+            await call(client, next(requests), timeout, recorder, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def open_loop(client, requests, qps, concurrency, timeout, recorder, stop_at):
+    # At most ``concurrency`` calls in flight; beyond that requests wait
+    # for a slot, and that wait counts towards their latency.
+    slots = asyncio.Semaphore(concurrency)
+    interval = 1.0 / qps
+    pending = set()
+
+    async def send(request, scheduled_at):
+        async with slots:
+            await call(client, request, timeout, recorder, scheduled_at)
+
+    scheduled_at = time.perf_counter()
+    while scheduled_at < stop_at:
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.ensure_future(send(next(requests), scheduled_at))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+        scheduled_at += interval
+    if pending:
+        await asyncio.gather(*pending)
+
+
+def report(recorder, measured, args):
+    latencies = sorted(recorder.latencies)
+    result = {
+        "mode": args.mode,
+        "concurrency": args.concurrency,
+        "target_qps": args.qps if args.mode == "open" else None,
+        "duration_s": round(measured, 3),
+        "requests": len(latencies),
+        "errors": recorder.errors,
+        "throughput_qps": round(len(latencies) / measured, 1) if measured else 0.0,
+    }
+    for name, fraction in (("p50", 0.50), ("p90", 0.90), ("p99", 0.99), ("p999", 0.999)):
+        result[f"{name}_ms"] = round(1000 * percentile(latencies, fraction), 3)
+    result["max_ms"] = round(1000 * latencies[-1], 3) if latencies else 0.0
+    return result
+
+
+async def run(args):
+    requests = request_generator(parse_mix(args.mix), args.max_results, args.users, args.seed)
+    async with grpc.aio.insecure_channel(args.target) as channel:
+        await asyncio.wait_for(channel.channel_ready(), timeout=10)
+        client = RecommendationsStub(channel)
+        started = time.perf_counter()
+        recorder = Recorder(measure_from=started + args.warmup)
+        stop_at = started + args.warmup + args.duration
+        if args.mode == "open":
+            await open_loop(client, requests, args.qps, args.concurrency, args.timeout, recorder, stop_at)
+        else:
+            await closed_loop(client, requests, args.concurrency, args.timeout, recorder, stop_at)
+        measured = time.perf_counter() - recorder.measure_from
+    return report(recorder, measured, args)
+
+
+def start_local_server(target):
+    from poc_grpc_microservice.recommendations.recommendations import serve
+    port = int(target.rsplit(":", 1)[1])
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    return server
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", default="localhost:50051")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=10,
+                        help="workers (closed loop) or max in-flight calls (open loop)")
+    parser.add_argument("--qps", type=float, default=1000, help="offered load in open loop mode")
+    parser.add_argument("--duration", type=float, default=10, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="seconds excluded from the report")
+    parser.add_argument("--mix", default="MYSTERY:1,SCIENCE_FICTION:1,SELF_HELP:1",
+                        help="category weights, e.g. MYSTERY:3,SELF_HELP:1")
+    parser.add_argument("--max-results", type=int, default=3)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=1.0, help="per-call deadline in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-server", action="store_true",
+                        help="run serve() locally on the target port for the duration")
+    return parser.parse_args(argv)
 
 
-print(request.max_results)
+def main(argv=None):
+    args = parse_args(argv)
+    server = start_local_server(args.target) if args.start_server else None
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+    print(json.dumps(result))
+    return result
 
 
-channel = grpc.insecure_channel("localhost:50051")
-client = RecommendationsStub(channel)
-print(client.Recommend(request))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""ASGI variant of the marketplace homepage on Quart and grpc.aio.
+
+Page requests never block a thread on a backend call, so a single process
+holds thousands of concurrent page requests. Templates, sections and
+environment variables are the same as for ``marketplace.py``::
+
+    hypercorn async_marketplace:app --bind localhost:5000
+"""
+import asyncio
+import itertools
+import os
+
+from markupsafe import Markup
+from quart import Quart, render_template
+import grpc
+
+from backend_pool import parse_targets
+from recommendations_pb2 import RecommendationRequest
+from recommendations_pb2_grpc import RecommendationsStub
+from sections import homepage_sections
+
+
+app = Quart(__name__)
+
+recommendations_targets = parse_targets(os.getenv(
+    "RECOMMENDATIONS_HOSTS", os.getenv("RECOMMENDATIONS_HOST", "localhost")
+))
+recommendations_timeout = float(os.getenv("RECOMMENDATIONS_TIMEOUT", "0.25"))
+
+recommendations_channels = []
+recommendations_stubs = None
+
+
+@app.before_serving
+async def open_channels():
+    # grpc.aio channels belong to the event loop that serves requests.
+    global recommendations_stubs
+    recommendations_channels.extend(
+        grpc.aio.insecure_channel(target) for target in recommendations_targets
+    )
+    recommendations_stubs = itertools.cycle(
+        [RecommendationsStub(channel) for channel in recommendations_channels]
+    )
+
+
+@app.after_serving
+async def close_channels():
+    await asyncio.gather(*(channel.close() for channel in recommendations_channels))
+    recommendations_channels.clear()
+
+
+async def fetch_section(user_id, title, category, max_results=3, timeout=None):
+    if timeout is None:
+        timeout = recommendations_timeout
+    request = RecommendationRequest(user_id=user_id, category=category, max_results=max_results)
+    try:
+        response = await next(recommendations_stubs).Recommend(request, timeout=timeout)
+        recommendations = list(response.recommendations)
+    except grpc.aio.AioRpcError as error:
+        app.logger.warning(f"{title}: {error.code().name}")
+        recommendations = None
+    return {"title": title, "recommendations": recommendations}
+
+
+async def fetch_sections(user_id, sections, max_results=3, timeout=None):
+    return await asyncio.gather(*(
+        fetch_section(user_id, title, category, max_results, timeout)
+        for title, category in sections
+    ))
+
+
+async def render_section(section):
+    return dict(section, html=Markup(await render_template("section.html", section=section)))
+
+
+@app.route("/", methods=['GET'])
+async def render_homepage():
+    sections = await fetch_sections(user_id=1, sections=homepage_sections)
+    return await render_template(
+        "homepage.html",
+        sections=[await render_section(section) for section in sections],
+    )
+
+
+if __name__ == '__main__':
+    app.run(debug=False, use_reloader=False)
\ No newline at end of file
@@ -0,0 +1,189 @@
+import itertools
+import threading
+import time
+
+import grpc
+
+from hedging import HedgingMethod, Scheduler
+from recommendations_pb2_grpc import RecommendationsStub
+from singleflight import CoalescingMethod
+
+
+# Codes that say something about the backend rather than the request.
+BACKEND_FAILURES = (grpc.StatusCode.UNAVAILABLE, grpc.StatusCode.DEADLINE_EXCEEDED)
+UNHEALTHY_STATES = (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+
+class Backend(object):
+    def __init__(self, target, channels_per_backend):
+        self.target = target
+        # A local subchannel pool per channel gives every channel its own
+        # HTTP/2 connection instead of sharing one per target.
+        self.channels = [
+            grpc.insecure_channel(target, options=[("grpc.use_local_subchannel_pool", 1)])
+            for _ in range(channels_per_backend)
+        ]
+        self.stubs = [RecommendationsStub(channel) for channel in self.channels]
+        self.states = [grpc.ChannelConnectivity.IDLE] * channels_per_backend
+        self._next_stub = itertools.cycle(self.stubs)
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        for index, channel in enumerate(self.channels):
+            channel.subscribe(lambda state, index=index: self._set_state(index, state))
+
+    def _set_state(self, index, state):
+        self.states[index] = state
+
+    def connected(self):
+        return any(state not in UNHEALTHY_STATES for state in self.states)
+
+    def next_stub(self):
+        return next(self._next_stub)
+
+    def close(self):
+        for channel in self.channels:
+            channel.close()
+
+
+class BackendPool(object):
+    """Client-side load balancer over several Recommendations backends.
+
+    ``policy`` is ``round_robin`` or ``least_outstanding``. Each backend
+    gets ``channels_per_backend`` connections, used in turn. A backend is
+    ejected for ``ejection_time`` seconds after ``max_failures`` consecutive
+    UNAVAILABLE/DEADLINE_EXCEEDED calls, or while all its channels are in
+    TRANSIENT_FAILURE. If every backend is unhealthy all of them are tried.
+
+    Exposes the unary RPCs with the same ``Recommend(...)`` and
+    ``Recommend.future(...)`` interface as ``RecommendationsStub``. With
+    ``coalesce`` identical concurrent requests share one call. Setting
+    ``hedge_percentile`` enables request hedging within ``hedge_budget``.
+    The streaming ``BrowseCategory`` is balanced but never coalesced or
+    hedged.
+    """
+
+    def __init__(self, targets, policy="round_robin", channels_per_backend=1,
+                 max_failures=3, ejection_time=10.0, coalesce=False,
+                 hedge_percentile=None, hedge_budget=0.05, clock=time.monotonic):
+        if policy not in ("round_robin", "least_outstanding"):
+            raise ValueError(f"Unknown load balancing policy: {policy}")
+        self.backends = [Backend(target, channels_per_backend) for target in targets]
+        self.policy = policy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self.hedging = {}
+        scheduler = Scheduler()
+        for name in ("Recommend", "BatchRecommend", "SimilarBooks"):
+            method = BalancedMethod(self, name)
+            if hedge_percentile is not None:
+                method = self.hedging[name] = HedgingMethod(
+                    method, percentile=hedge_percentile, budget=hedge_budget, scheduler=scheduler
+                )
+            if coalesce:
+                method = CoalescingMethod(method)
+            setattr(self, name, method)
+        self.BrowseCategory = BalancedStreamMethod(self, "BrowseCategory")
+
+    def healthy_backends(self):
+        now = self.clock()
+        healthy = [
+            backend for backend in self.backends
+            if backend.ejected_until <= now and backend.connected()
+        ]
+        return healthy or self.backends
+
+    def acquire(self, exclude=None):
+        with self._lock:
+            candidates = self.healthy_backends()
+            if exclude is not None and len(candidates) > 1:
+                candidates = [candidate for candidate in candidates if candidate is not exclude]
+            if self.policy == "least_outstanding":
+                backend = min(candidates, key=lambda candidate: candidate.outstanding)
+            else:
+                backend = candidates[next(self._round_robin) % len(candidates)]
+            backend.outstanding += 1
+            return backend
+
+    def release(self, backend, code):
+        with self._lock:
+            backend.outstanding -= 1
+            if code in BACKEND_FAILURES:
+                backend.consecutive_failures += 1
+                if backend.consecutive_failures >= self.max_failures:
+                    backend.ejected_until = self.clock() + self.ejection_time
+                    backend.consecutive_failures = 0
+            else:
+                backend.consecutive_failures = 0
+
+    def stats(self):
+        return {
+            "backends": [
+                {
+                    "target": backend.target,
+                    "outstanding": backend.outstanding,
+                    "ejected": backend.ejected_until > self.clock(),
+                    "connected": backend.connected(),
+                }
+                for backend in self.backends
+            ],
+            "hedging": {name: method.stats() for name, method in self.hedging.items()},
+        }
+
+    def close(self):
+        for backend in self.backends:
+            backend.close()
+
+
+class BalancedMethod(object):
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+
+    def start(self, request, timeout=None, exclude=None, **kwargs):
+        """Start a call on a backend other than ``exclude`` if possible,
+        returning ``(backend, call)``."""
+        backend = self.pool.acquire(exclude)
+        try:
+            call = getattr(backend.next_stub(), self.name).future(request, timeout=timeout, **kwargs)
+        except Exception:
+            self.pool.release(backend, grpc.StatusCode.UNKNOWN)
+            raise
+        call.add_done_callback(lambda done: self.pool.release(backend, done.code()))
+        return backend, call
+
+    def future(self, request, timeout=None, **kwargs):
+        return self.start(request, timeout=timeout, **kwargs)[1]
+
+    def __call__(self, request, timeout=None, **kwargs):
+        return self.future(request, timeout=timeout, **kwargs).result()
+
+
+class BalancedStreamMethod(object):
+    def __init__(self, pool, name):
+        self.pool = pool
+        self.name = name
+
+    def __call__(self, request, timeout=None, **kwargs):
+        """Start a server-streaming call; the backend counts as outstanding
+        until the stream ends."""
+        backend = self.pool.acquire()
+        try:
+            call = getattr(backend.next_stub(), self.name)(request, timeout=timeout, **kwargs)
+        except Exception:
+            self.pool.release(backend, grpc.StatusCode.UNKNOWN)
+            raise
+        call.add_done_callback(lambda done: self.pool.release(backend, done.code()))
+        return call
+
+
+def parse_targets(hosts, default_port=50051):
+    """``"a,b:6000"`` -> ``["a:50051", "b:6000"]``"""
+    return [
+        host if ":" in host else f"{host}:{default_port}"
+        for host in (host.strip() for host in hosts.split(","))
+        if host
+    ]
@@ -0,0 +1,150 @@
+"""Compare the sync Flask homepage with the async Quart/grpc.aio one.
+
+Starts an asyncio recommendations backend that answers after
+``--backend-delay`` seconds, the Flask dev server (threaded) and the Quart app
+under hypercorn, then keeps N page requests in flight against each frontend.
+Caching and coalescing are turned off so every page reaches the backend.
+
+    python -m poc_grpc_microservice.marketplace.bench_marketplace --concurrency 10 100 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+MARKETPLACE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(MARKETPLACE_DIR))
+
+BACKEND = """
+import asyncio
+from poc_grpc_microservice.recommendations.recommendations import AsyncRecommendationService, create_async_server
+
+class DelayedService(AsyncRecommendationService):
+    async def Recommend(self, request, context):
+        await asyncio.sleep({delay})
+        return await super().Recommend(request, context)
+
+async def serve():
+    server = create_async_server({port}, servicer=DelayedService(), max_concurrent_rpcs=100000)
+    await server.start()
+    await server.wait_for_termination()
+
+asyncio.run(serve())
+"""
+
+
+def wait_for_port(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("localhost", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"nothing listening on port {port}")
+
+
+def start(command, cwd, env, port):
+    process = subprocess.Popen(
+        command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    wait_for_port(port)
+    return process
+
+
+async def get(port):
+    reader, writer = await asyncio.open_connection("localhost", port)
+    writer.write(b"GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.startswith(b"HTTP/1.1 200") or response.startswith(b"HTTP/1.0 200")
+
+
+async def drive(port, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = await asyncio.wait_for(get(port), timeout=30)
+            except (OSError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "pages": len(latencies),
+        "errors": errors,
+        "pages_per_s": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(1000 * latencies[len(latencies) // 2], 1) if latencies else None,
+        "p99_ms": round(1000 * latencies[int(len(latencies) * 0.99)], 1) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--backend-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    backend_port, sync_port, async_port = get_free_port(), get_free_port(), get_free_port()
+    env = dict(
+        os.environ,
+        RECOMMENDATIONS_HOSTS=f"localhost:{backend_port}",
+        RECOMMENDATIONS_TIMEOUT="5",
+        RECOMMENDATIONS_COALESCE="0",
+        FRAGMENT_CACHE_TTL="0",
+    )
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [REPOSITORY_DIR, env.get("PYTHONPATH")]))
+
+    processes = [start(
+        [sys.executable, "-c", BACKEND.format(port=backend_port, delay=args.backend_delay)],
+        REPOSITORY_DIR, env, backend_port,
+    )]
+    try:
+        frontends = {
+            "flask": (start(
+                [sys.executable, "-c", f"import marketplace; marketplace.app.run(port={sync_port}, threaded=True)"],
+                MARKETPLACE_DIR, env, sync_port,
+            ), sync_port),
+            "quart": (start(
+                [sys.executable, "-m", "hypercorn", "async_marketplace:app", "--bind", f"localhost:{async_port}"],
+                MARKETPLACE_DIR, env, async_port,
+            ), async_port),
+        }
+        processes.extend(process for process, _ in frontends.values())
+        results = []
+        for name, (_, port) in frontends.items():
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(port, concurrency, args.duration))
+                result["frontend"] = name
+                results.append(result)
+                print(json.dumps(result))
+        return results
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import threading
+import time
+
+
+class StaleWhileRevalidateCache(object):
+    """TTL cache that keeps serving an expired entry while it is refreshed.
+
+    ``lookup`` returns fresh entries as-is. Once an entry is older than
+    ``ttl`` it is still returned, and one background thread per key runs
+    the caller's ``refresh`` to replace it. Entries older than ``max_stale``
+    are dropped so a backend that stays down is eventually noticed. A
+    ``ttl`` of zero or less disables the cache.
+    """
+
+    def __init__(self, ttl, max_stale=None, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_stale = max_stale if max_stale is not None else 10 * ttl
+        self.clock = clock
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def put(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+
+    def lookup(self, key, refresh):
+        """Cached value for ``key`` or None. ``refresh()`` returns the new
+        value, or None to keep the stale one."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            age = self.clock() - stored_at
+            if age > self.max_stale:
+                del self._entries[key]
+                return None
+            if age <= self.ttl or key in self._refreshing:
+                return value
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key, refresh), daemon=True).start()
+        return value
+
+    def _refresh(self, key, refresh):
+        try:
+            value = refresh()
+            if value is not None:
+                self.put(key, value)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
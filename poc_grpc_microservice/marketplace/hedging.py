@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from concurrent import futures
+
+
+class HedgeBudget(object):
+    """Token bucket allowing hedges for at most ``ratio`` of the calls.
+
+    Every primary call adds ``ratio`` tokens (up to ``burst``), every hedge
+    spends one, so hedging never adds more than ``ratio`` extra load.
+    """
+
+    def __init__(self, ratio, burst=10):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class LatencyTracker(object):
+    """Sliding window of call latencies with a periodically refreshed
+    percentile, so picking a hedge delay does not sort on every call."""
+
+    def __init__(self, percentile, window=1000, min_samples=50, refresh_every=50):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._samples = deque(maxlen=window)
+        self._since_refresh = 0
+        self._value = None
+        self._lock = threading.Lock()
+
+    def observe(self, latency):
+        with self._lock:
+            self._samples.append(latency)
+            self._since_refresh += 1
+            if len(self._samples) >= self.min_samples and self._since_refresh >= self.refresh_every:
+                ordered = sorted(self._samples)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+                self._value = ordered[index]
+                self._since_refresh = 0
+
+    def value(self):
+        return self._value
+
+
+class Scheduler(object):
+    """One daemon thread running short callbacks at a given time."""
+
+    def __init__(self):
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay, callback):
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            heapq.heappush(self._queue, (time.monotonic() + delay, next(self._sequence), callback))
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                when, _, callback = self._queue[0]
+                delay = when - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._queue)
+            try:
+                callback()
+            except Exception:
+                logging.exception("scheduled callback failed")
+
+
+class HedgingMethod(object):
+    """Send a duplicate call to another backend when the first one is slow.
+
+    Wraps a ``BalancedMethod``. When a call has not finished after the
+    ``percentile`` latency of recent calls (``initial_delay`` until enough
+    calls were seen) a hedge is sent to a different backend, as long as the
+    ``HedgeBudget`` allows it. The first successful response wins and the
+    other call is cancelled. ``stats()`` reports how often hedging fired.
+    """
+
+    def __init__(self, method, percentile=95, budget=0.05, initial_delay=0.05, scheduler=None):
+        self.method = method
+        self.tracker = LatencyTracker(percentile)
+        self.budget = HedgeBudget(budget)
+        self.initial_delay = initial_delay
+        self.scheduler = scheduler if scheduler is not None else Scheduler()
+        self.counters = {"calls": 0, "hedges": 0, "hedges_won": 0, "hedges_over_budget": 0}
+        self._counters_lock = threading.Lock()
+
+    def count(self, name):
+        with self._counters_lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._counters_lock:
+            stats = dict(self.counters)
+        delay = self.tracker.value()
+        stats["hedge_delay_ms"] = round(1000 * (delay if delay is not None else self.initial_delay), 3)
+        return stats
+
+    def future(self, request, timeout=None, **kwargs):
+        self.count("calls")
+        self.budget.deposit()
+        hedged = HedgedCall(self, request, timeout, kwargs)
+        hedged.start()
+        delay = self.tracker.value()
+        self.scheduler.call_later(delay if delay is not None else self.initial_delay, hedged.hedge)
+        return hedged.outcome
+
+    def __call__(self, request, timeout=None, **kwargs):
+        return self.future(request, timeout=timeout, **kwargs).result()
+
+
+class HedgedCall(object):
+    def __init__(self, hedging, request, timeout, kwargs):
+        self.hedging = hedging
+        self.request = request
+        self.timeout = timeout
+        self.kwargs = kwargs
+        self.outcome = futures.Future()
+        self.started_at = time.monotonic()
+        self.backends = []
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def start(self, exclude=None):
+        timeout = self.timeout
+        if timeout is not None:
+            # The hedge only gets what is left of the caller's deadline.
+            timeout = max(0.0, timeout - (time.monotonic() - self.started_at))
+        backend, call = self.hedging.method.start(
+            self.request, timeout=timeout, exclude=exclude, **self.kwargs
+        )
+        with self._lock:
+            self.backends.append(backend)
+            self.calls.append(call)
+            finished = self.outcome.done()
+        if finished:
+            # The other call won while this one was being started.
+            call.cancel()
+        call.add_done_callback(self._on_done)
+
+    def hedge(self):
+        with self._lock:
+            if self.outcome.done() or len(self.calls) > 1:
+                return
+        if not self.hedging.budget.withdraw():
+            self.hedging.count("hedges_over_budget")
+            return
+        self.hedging.count("hedges")
+        self.start(exclude=self.backends[0])
+
+    def _on_done(self, call):
+        succeeded = not call.cancelled() and call.exception() is None
+        with self._lock:
+            if self.outcome.done():
+                return
+            if succeeded:
+                losers = [other for other in self.calls if other is not call]
+                self.outcome.set_result(call.result())
+            elif all(other.done() for other in self.calls):
+                # Only give up once every call that was sent has failed.
+                losers = []
+                self.outcome.set_exception(
+                    futures.CancelledError() if call.cancelled() else call.exception()
+                )
+            else:
+                return
+            primary = call is self.calls[0]
+        if succeeded:
+            # When the hedge wins, the primary took at least this long.
+            # Leaving those slow calls out would pull the percentile, and
+            # so the hedge delay, below what was configured.
+            self.hedging.tracker.observe(time.monotonic() - self.started_at)
+        if succeeded and not primary:
+            self.hedging.count("hedges_won")
+        for loser in losers:
+            loser.cancel()
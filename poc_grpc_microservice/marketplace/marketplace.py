@@ -1,34 +1,161 @@
 import os
+from functools import partial
 
-from flask import Flask, render_template
+from flask import Flask, abort, jsonify, render_template, request, stream_template
+from markupsafe import Markup
 import grpc
 
+from backend_pool import BackendPool, parse_targets
+from fragment_cache import StaleWhileRevalidateCache
 from recommendations_pb2 import BookCategory, RecommendationRequest
-from recommendations_pb2_grpc import RecommendationsStub
+from sections import homepage_sections
 
 
 app = Flask(__name__)
 app.config["DEBUG"] = True
 
-recommendations_host = os.getenv("RECOMMENDATIONS_HOST", "localhost")
-recommendations_channel = grpc.insecure_channel(
-    f"{recommendations_host}:50051"
+# RECOMMENDATIONS_HOSTS is a comma separated list of backends ("host" or
+# "host:port"); RECOMMENDATIONS_HOST is still honoured for a single backend.
+recommendations_hosts = os.getenv(
+    "RECOMMENDATIONS_HOSTS", os.getenv("RECOMMENDATIONS_HOST", "localhost")
 )
-recommendations_client = RecommendationsStub(recommendations_channel)
+# Opt-in: hedge calls slower than this latency percentile, e.g. 95.
+hedge_percentile = os.getenv("RECOMMENDATIONS_HEDGE_PERCENTILE")
+recommendations_client = BackendPool(
+    parse_targets(recommendations_hosts),
+    policy=os.getenv("RECOMMENDATIONS_LB_POLICY", "round_robin"),
+    channels_per_backend=int(os.getenv("RECOMMENDATIONS_CHANNELS_PER_BACKEND", "1")),
+    coalesce=os.getenv("RECOMMENDATIONS_COALESCE", "1") == "1",
+    hedge_percentile=float(hedge_percentile) if hedge_percentile else None,
+    hedge_budget=float(os.getenv("RECOMMENDATIONS_HEDGE_BUDGET", "0.05")),
+)
+
+# Per-call deadline in seconds. All sections are fetched concurrently, so
+# this is also the upper bound the backend adds to the page latency.
+recommendations_timeout = float(os.getenv("RECOMMENDATIONS_TIMEOUT", "0.25"))
+
+# Category pages stream a long list, so they get their own, longer deadline.
+browse_timeout = float(os.getenv("RECOMMENDATIONS_BROWSE_TIMEOUT", "5"))
+max_browse_results = 1000
+
+# Rendered sections are shared by every user of a segment and served stale
+# while one background refresh per (segment, category) runs.
+homepage_segments = int(os.getenv("HOMEPAGE_SEGMENTS", "16"))
+fragment_cache = StaleWhileRevalidateCache(
+    ttl=float(os.getenv("FRAGMENT_CACHE_TTL", "30"))
+)
+
+
+def fetch_sections(user_id, sections, max_results=3, timeout=None):
+    """Fetch every section concurrently; a section whose call fails or
+    misses its deadline comes back with ``recommendations=None``."""
+    if timeout is None:
+        timeout = recommendations_timeout
+    calls = [
+        (title, recommendations_client.Recommend.future(
+            RecommendationRequest(user_id=user_id, category=category, max_results=max_results),
+            timeout=timeout,
+        ))
+        for title, category in sections
+    ]
+    fetched = []
+    for title, call in calls:
+        try:
+            recommendations = list(call.result().recommendations)
+        except grpc.RpcError as error:
+            app.logger.warning(f"{title}: {error.code().name}")
+            recommendations = None
+        fetched.append({"title": title, "recommendations": recommendations})
+    return fetched
+
+
+def user_segment(user_id):
+    return user_id % homepage_segments
+
+
+def render_section(section):
+    return dict(section, html=Markup(render_template("section.html", section=section)))
+
+
+def refresh_section(user_id, title, category):
+    section = fetch_sections(user_id, [(title, category)])[0]
+    if section["recommendations"] is None:
+        return None
+    with app.app_context():
+        return render_section(section)
+
+
+def homepage_fragments(user_id, sections):
+    segment = user_segment(user_id)
+    cached = [
+        fragment_cache.lookup((segment, category), partial(refresh_section, user_id, title, category))
+        for title, category in sections
+    ]
+    # Cache misses are still fetched together in one concurrent fan-out.
+    missing = [section for section, fragment in zip(sections, cached) if fragment is None]
+    fetched = iter(fetch_sections(user_id, missing))
+
+    fragments = []
+    for (title, category), fragment in zip(sections, cached):
+        if fragment is None:
+            fragment = render_section(next(fetched))
+            if fragment["recommendations"] is not None:
+                fragment_cache.put((segment, category), fragment)
+        fragments.append(fragment)
+    return fragments
 
 
 @app.route("/", methods=['GET'])
 def render_homepage():
-    recommendations_request = RecommendationRequest(
-        user_id=1, category=BookCategory.MYSTERY, max_results=3
-    )
-    recommendations_response = recommendations_client.Recommend(
-        recommendations_request
-    )
     return render_template(
         "homepage.html",
-        recommendations=recommendations_response.recommendations,
+        sections=homepage_fragments(user_id=1, sections=homepage_sections),
+    )
+
+
+class BookStream(object):
+    """Books of a BrowseCategory call, yielded as the chunks arrive. A
+    call that fails part way ends the list early and sets ``failed``."""
+
+    def __init__(self, call):
+        self.call = call
+        self.failed = False
+
+    def __iter__(self):
+        try:
+            for response in self.call:
+                yield from response.recommendations
+        except grpc.RpcError as error:
+            app.logger.warning(f"BrowseCategory: {error.code().name}")
+            self.failed = True
+        finally:
+            # Stops the backend when the browser goes away mid-page.
+            self.call.cancel()
+
+
+@app.route("/category/<name>", methods=['GET'])
+def render_category(name):
+    try:
+        category = BookCategory.Value(name.upper())
+    except ValueError:
+        abort(404)
+    max_results = max(0, min(request.args.get("max_results", 100, type=int), max_browse_results))
+    call = recommendations_client.BrowseCategory(
+        RecommendationRequest(user_id=1, category=category, max_results=max_results),
+        timeout=browse_timeout,
     )
+    # The call is already running while the page header is sent; list items
+    # are rendered and flushed chunk by chunk instead of as one string.
+    return stream_template(
+        "category.html",
+        title=name.replace("_", " ").capitalize() + " books",
+        books=BookStream(call),
+    )
+
+
+@app.route("/metrics/recommendations", methods=['GET'])
+def recommendations_metrics():
+    return jsonify(recommendations_client.stats())
 
 
 def init_api():
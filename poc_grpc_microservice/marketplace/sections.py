@@ -0,0 +1,9 @@
+from recommendations_pb2 import BookCategory
+
+
+# (heading, category) of every homepage section, shared by both frontends.
+homepage_sections = [
+    ("Mystery books you may like", BookCategory.MYSTERY),
+    ("Science fiction books you may like", BookCategory.SCIENCE_FICTION),
+    ("Self-help books you may like", BookCategory.SELF_HELP),
+]
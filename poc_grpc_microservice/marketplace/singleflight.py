@@ -0,0 +1,40 @@
+import threading
+
+
+class CoalescingMethod(object):
+    """Share one in-flight call between identical concurrent requests.
+
+    Wraps anything with a ``future(request, timeout=None)`` method, such as
+    a stub method or ``BalancedMethod``. While a call for the same request
+    bytes and timeout is running, later callers get that call's future
+    instead of issuing their own; once it completes the next caller starts
+    a fresh one. Callers must not cancel the shared future.
+    """
+
+    def __init__(self, method):
+        self.method = method
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def future(self, request, timeout=None, **kwargs):
+        key = (request.SerializeToString(deterministic=True), timeout)
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.coalesced += 1
+                return call
+            self.calls += 1
+            call = self.method.future(request, timeout=timeout, **kwargs)
+            self._in_flight[key] = call
+        call.add_done_callback(lambda done: self._forget(key, done))
+        return call
+
+    def __call__(self, request, timeout=None, **kwargs):
+        return self.future(request, timeout=timeout, **kwargs).result()
+
+    def _forget(self, key, call):
+        with self._lock:
+            if self._in_flight.get(key) is call:
+                del self._in_flight[key]
@@ -0,0 +1,44 @@
+import asyncio
+import time
+import pytest
+import async_marketplace
+from recommendations_pb2 import BookCategory
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+class SlowSelfHelpService(RecommendationService):
+    def Recommend(self, request, context):
+        if request.category == BookCategory.SELF_HELP:
+            time.sleep(1)
+        return super().Recommend(request, context)
+
+
+@pytest.fixture(scope="module")
+def backend():
+    port = get_free_port()
+    server = create_server(port, servicer=SlowSelfHelpService())
+    server.start()
+    yield f"localhost:{port}"
+    server.stop(None)
+
+
+async def get_homepage(times):
+    async with async_marketplace.app.test_app() as test_app:
+        client = test_app.test_client()
+        responses = await asyncio.gather(*(client.get("/") for _ in range(times)))
+        return [(response.status_code, await response.get_data(as_text=True)) for response in responses]
+
+
+def test_async_homepage_renders_partially(backend, monkeypatch):
+    monkeypatch.setattr(async_marketplace, "recommendations_targets", [backend])
+    monkeypatch.setattr(async_marketplace, "recommendations_timeout", 0.3)
+    started = time.perf_counter()
+    # The slow calls hold 3 of the backend's 10 workers.
+    pages = asyncio.run(get_homepage(times=3))
+    assert time.perf_counter() - started < 0.9
+    for status_code, page in pages:
+        assert status_code == 200
+        assert "Mystery books you may like" in page
+        assert page.count("<li>") == 6
+        assert page.count("Recommendations are not available right now.") == 1
@@ -0,0 +1,95 @@
+import grpc
+import pytest
+from backend_pool import BackendPool, parse_targets
+from recommendations_pb2 import BookCategory, RecommendationRequest
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+REQUEST = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=1)
+
+
+class CountingService(RecommendationService):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def Recommend(self, request, context):
+        self.calls += 1
+        return super().Recommend(request, context)
+
+
+@pytest.fixture
+def backends():
+    started = []
+    for _ in range(3):
+        port = get_free_port()
+        servicer = CountingService()
+        server = create_server(port, servicer=servicer)
+        server.start()
+        started.append((f"localhost:{port}", server, servicer))
+    yield started
+    for _, server, _ in started:
+        server.stop(None)
+
+
+def test_parse_targets():
+    assert parse_targets("a, b:6000,,[::1]:7000") == ["a:50051", "b:6000", "[::1]:7000"]
+
+
+def test_round_robin_spreads_calls(backends):
+    pool = BackendPool([target for target, _, _ in backends], channels_per_backend=2)
+    try:
+        for _ in range(30):
+            assert len(pool.Recommend(REQUEST, timeout=5).recommendations) == 1
+        assert [servicer.calls for _, _, servicer in backends] == [10, 10, 10]
+        assert all(len(backend.channels) == 2 for backend in pool.backends)
+        assert all(backend.outstanding == 0 for backend in pool.backends)
+    finally:
+        pool.close()
+
+
+def test_browse_category_stream_is_balanced(backends):
+    pool = BackendPool([target for target, _, _ in backends])
+    try:
+        request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=3)
+        for _ in range(3):
+            responses = list(pool.BrowseCategory(request, timeout=5))
+            assert sum(len(response.recommendations) for response in responses) == 3
+    finally:
+        pool.close()
+
+
+def test_failed_backend_is_ejected(backends):
+    pool = BackendPool([target for target, _, _ in backends], max_failures=2)
+    try:
+        backends[0][1].stop(None)
+        failures = 0
+        for _ in range(30):
+            try:
+                pool.Recommend.future(REQUEST, timeout=1).result()
+            except grpc.RpcError as error:
+                assert error.code() == grpc.StatusCode.UNAVAILABLE
+                failures += 1
+        assert failures <= 2
+        assert backends[1][2].calls + backends[2][2].calls == 30 - failures
+    finally:
+        pool.close()
+
+
+def test_least_outstanding_prefers_idle_backends(backends):
+    pool = BackendPool([target for target, _, _ in backends], policy="least_outstanding")
+    try:
+        busy = [pool.acquire(), pool.acquire()]
+        assert busy[0] is not busy[1]
+        idle = pool.acquire()
+        assert idle not in busy
+        pool.release(busy[0], grpc.StatusCode.OK)
+        assert pool.acquire() is busy[0]
+    finally:
+        pool.close()
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BackendPool(["localhost:1"], policy="random")
@@ -0,0 +1,63 @@
+import threading
+import time
+from fragment_cache import StaleWhileRevalidateCache
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_fresh_entries_do_not_refresh():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=10, clock=clock)
+    assert cache.lookup("key", refresh=lambda: "new") is None
+    cache.put("key", "old")
+    clock.now = 10
+    assert cache.lookup("key", refresh=lambda: 1 / 0) == "old"
+
+
+def test_stale_entry_is_served_while_one_refresh_runs():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=10, clock=clock)
+    cache.put("key", "old")
+    clock.now = 11
+
+    release = threading.Event()
+    refreshes = []
+
+    def refresh():
+        refreshes.append(1)
+        release.wait(5)
+        return "new"
+
+    assert cache.lookup("key", refresh) == "old"
+    assert cache.lookup("key", refresh) == "old"
+    release.set()
+    for _ in range(100):
+        if cache.lookup("key", refresh) == "new":
+            break
+        time.sleep(0.01)
+    assert cache.lookup("key", refresh) == "new"
+    assert len(refreshes) == 1
+
+
+def test_failed_refresh_keeps_stale_entry_until_max_stale():
+    clock = FakeClock()
+    cache = StaleWhileRevalidateCache(ttl=10, max_stale=60, clock=clock)
+    cache.put("key", "old")
+    clock.now = 30
+    done = threading.Event()
+
+    def refresh():
+        done.set()
+        return None
+
+    assert cache.lookup("key", refresh) == "old"
+    assert done.wait(5)
+    assert cache.lookup("key", lambda: None) == "old"
+    clock.now = 61
+    assert cache.lookup("key", lambda: None) is None
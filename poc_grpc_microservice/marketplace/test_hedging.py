@@ -0,0 +1,85 @@
+import time
+import pytest
+from backend_pool import BackendPool
+from hedging import HedgeBudget, LatencyTracker
+from recommendations_pb2 import BookCategory, RecommendationRequest
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+REQUEST = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=1)
+
+
+class DelayedService(RecommendationService):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def Recommend(self, request, context):
+        time.sleep(self.delay)
+        return super().Recommend(request, context)
+
+
+@pytest.fixture
+def targets():
+    servers = []
+    for delay in (1.0, 0.0):
+        port = get_free_port()
+        server = create_server(port, servicer=DelayedService(delay))
+        server.start()
+        servers.append((f"localhost:{port}", server))
+    yield [target for target, _ in servers]
+    for _, server in servers:
+        server.stop(None)
+
+
+def test_budget_limits_hedges():
+    budget = HedgeBudget(ratio=0.5)
+    assert not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+
+def test_latency_tracker_percentile():
+    tracker = LatencyTracker(percentile=90, min_samples=10, refresh_every=10)
+    for latency in range(1, 10):
+        tracker.observe(latency)
+    assert tracker.value() is None
+    tracker.observe(10)
+    assert tracker.value() == 10
+    for latency in range(10):
+        tracker.observe(0.5)
+    assert tracker.value() == 9
+
+
+def test_slow_calls_are_hedged_to_another_backend(targets):
+    pool = BackendPool(targets, hedge_percentile=95, hedge_budget=1.0)
+    try:
+        started = time.perf_counter()
+        # Round robin sends primary calls to the slow backend too.
+        for _ in range(4):
+            assert len(pool.Recommend(REQUEST, timeout=5).recommendations) == 1
+        assert time.perf_counter() - started < 1.0
+        stats = pool.stats()["hedging"]["Recommend"]
+        assert stats["calls"] == 4
+        assert 2 <= stats["hedges_won"] <= stats["hedges"]
+        # Calls won by a hedge still count towards the latency percentile.
+        assert len(pool.hedging["Recommend"].tracker._samples) == 4
+    finally:
+        pool.close()
+
+
+def test_hedging_respects_budget(targets):
+    pool = BackendPool(targets, hedge_percentile=95, hedge_budget=0.0)
+    try:
+        started = time.perf_counter()
+        pool.Recommend(REQUEST, timeout=5)
+        pool.Recommend(REQUEST, timeout=5)
+        assert time.perf_counter() - started >= 1.0
+        stats = pool.stats()["hedging"]["Recommend"]
+        assert stats["hedges"] == 0
+        assert stats["hedges_over_budget"] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,107 @@
+import time
+import grpc
+import pytest
+import marketplace
+from recommendations_pb2 import BookCategory
+from recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+class SlowSelfHelpService(RecommendationService):
+    mystery_calls = 0
+
+    def Recommend(self, request, context):
+        if request.category == BookCategory.MYSTERY:
+            SlowSelfHelpService.mystery_calls += 1
+        if request.category == BookCategory.SELF_HELP:
+            time.sleep(1)
+        return super().Recommend(request, context)
+
+    def BrowseCategory(self, request, context):
+        if request.category == BookCategory.SELF_HELP:
+            time.sleep(1)
+        yield from super().BrowseCategory(request, context)
+
+
+@pytest.fixture(scope="module")
+def backend():
+    port = get_free_port()
+    server = create_server(port, servicer=SlowSelfHelpService())
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    yield channel
+    channel.close()
+    server.stop(None)
+
+
+@pytest.fixture
+def client(backend, monkeypatch):
+    monkeypatch.setattr(marketplace, "recommendations_client", RecommendationsStub(backend))
+    marketplace.fragment_cache.clear()
+    return marketplace.app.test_client()
+
+
+def test_homepage_renders_partially_when_a_section_misses_its_deadline(client, monkeypatch):
+    monkeypatch.setattr(marketplace, "recommendations_timeout", 0.3)
+    started = time.perf_counter()
+    rtn = client.get("/")
+    elapsed = time.perf_counter() - started
+    assert rtn.status_code == 200
+
+    page = rtn.get_data(as_text=True)
+    assert "Mystery books you may like" in page
+    assert "Science fiction books you may like" in page
+    assert page.count("<li>") == 6
+    assert page.count("Recommendations are not available right now.") == 1
+    # Bounded by the per-call deadline, not by the slow backend.
+    assert elapsed < 0.9
+
+
+def test_fetch_sections_is_concurrent(client):
+    sections = [(str(section), BookCategory.SELF_HELP) for section in range(3)]
+    started = time.perf_counter()
+    fetched = marketplace.fetch_sections(user_id=1, sections=sections, timeout=5)
+    # Three 1s calls take about 1s in total, not 3s.
+    assert time.perf_counter() - started < 2
+    assert [len(section["recommendations"]) for section in fetched] == [3] * 3
+
+
+def test_homepage_sections_are_cached(client, monkeypatch):
+    monkeypatch.setattr(marketplace, "recommendations_timeout", 0.3)
+    first = client.get("/").get_data(as_text=True)
+    calls = SlowSelfHelpService.mystery_calls
+    second = client.get("/").get_data(as_text=True)
+    # Sections that rendered are served from the cache, only the one that
+    # timed out is fetched again.
+    assert SlowSelfHelpService.mystery_calls == calls
+    assert first == second
+
+
+def test_category_page_streams_the_header_first(client):
+    started = time.perf_counter()
+    rtn = client.get("/category/self_help?max_results=3", buffered=False)
+    assert rtn.status_code == 200
+    assert rtn.is_streamed
+    chunks = iter(rtn.response)
+    header = b""
+    while b"<ul>" not in header:
+        header += next(chunks)
+    # The header is flushed before the slow backend sends any book.
+    assert time.perf_counter() - started < 0.5
+    assert b"<h1>Self help books</h1>" in header
+
+    page = (header + b"".join(chunks)).decode()
+    assert page.count("<li>") == 3
+    assert "not available" not in page
+    rtn.close()
+
+
+def test_category_page_for_unknown_category(client):
+    assert client.get("/category/poetry").status_code == 404
+
+
+def test_category_page_with_negative_max_results(client):
+    page = client.get("/category/mystery?max_results=-5").get_data(as_text=True)
+    assert page.count("<li>") == 0
+    assert "not available" not in page
@@ -0,0 +1,66 @@
+import threading
+from concurrent import futures
+from recommendations_pb2 import BookCategory, RecommendationRequest
+from singleflight import CoalescingMethod
+
+
+class FakeMethod(object):
+    def __init__(self):
+        self.calls = []
+
+    def future(self, request, timeout=None):
+        call = futures.Future()
+        self.calls.append((request, call))
+        return call
+
+
+def request(category=BookCategory.MYSTERY):
+    return RecommendationRequest(user_id=1, category=category, max_results=3)
+
+
+def test_identical_requests_share_one_call():
+    method = FakeMethod()
+    coalescing = CoalescingMethod(method)
+    calls = [coalescing.future(request(), timeout=1) for _ in range(100)]
+    assert len(method.calls) == 1
+    assert all(call is calls[0] for call in calls)
+    assert (coalescing.calls, coalescing.coalesced) == (1, 99)
+
+    method.calls[0][1].set_result("response")
+    assert [call.result() for call in calls] == ["response"] * 100
+
+
+def test_different_requests_are_not_shared():
+    method = FakeMethod()
+    coalescing = CoalescingMethod(method)
+    coalescing.future(request(BookCategory.MYSTERY), timeout=1)
+    coalescing.future(request(BookCategory.SELF_HELP), timeout=1)
+    coalescing.future(request(BookCategory.MYSTERY), timeout=2)
+    assert len(method.calls) == 3
+
+
+def test_completed_call_is_not_reused():
+    method = FakeMethod()
+    coalescing = CoalescingMethod(method)
+    coalescing.future(request()).set_result("first")
+    coalescing.future(request())
+    assert len(method.calls) == 2
+
+
+def test_concurrent_callers():
+    method = FakeMethod()
+    coalescing = CoalescingMethod(method)
+    start = threading.Barrier(20)
+    results = []
+
+    def caller():
+        start.wait()
+        results.append(coalescing.future(request()))
+
+    threads = [threading.Thread(target=caller) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(method.calls) == 1
+    assert len(results) == 20
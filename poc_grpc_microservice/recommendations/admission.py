@@ -0,0 +1,115 @@
+"""Admission control for the Recommendations server.
+
+The concurrency limit and the bounded queue come from gRPC itself:
+``maximum_concurrent_rpcs`` (workers + queue slots) makes the server reject
+anything beyond it with RESOURCE_EXHAUSTED before a handler runs, instead
+of letting the thread pool queue grow without bound.
+
+``DeadlineInterceptor`` handles what is left: a request that waited in the
+queue until its remaining deadline is shorter than the expected service
+time would only expire halfway through, so it is failed with
+DEADLINE_EXCEEDED before doing any work. Expected service time is an
+exponentially weighted moving average per method.
+
+Only the queue wait can get a request shed: one whose deadline was already
+shorter than the estimate when it arrived is served anyway. Those calls
+keep feeding the estimate, so after a slow spell it comes back down even
+if every client uses a deadline below it. The interceptor runs when the
+server accepts the call, before it is queued for a worker, which is where
+the wait is measured from. The asyncio server has no queue, so there it
+rarely sheds.
+"""
+import time
+import grpc
+
+
+MAX_WORKERS = 10
+MAX_QUEUED_RPCS = 40
+# The asyncio server has no worker pool, only an overall cap.
+MAX_ASYNC_CONCURRENT_RPCS = 1000
+SHED_MESSAGE = "Shed: remaining deadline is shorter than the expected service time"
+
+
+class ServiceTimeEstimator(object):
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self._estimates = {}
+
+    def expected(self, method):
+        return self._estimates.get(method, 0.0)
+
+    def observe(self, method, service_time):
+        # Unlocked read-modify-write: a lost update only skews the average.
+        estimate = self._estimates.get(method)
+        if estimate is None:
+            self._estimates[method] = service_time
+        else:
+            self._estimates[method] = estimate + self.alpha * (service_time - estimate)
+
+
+def should_shed(context, expected_service_time, queued_for):
+    remaining = context.time_remaining()
+    # time_remaining() is None, or huge, when the client set no deadline.
+    if remaining is None or remaining >= expected_service_time:
+        return False
+    # Shed only if the deadline was long enough on arrival and the wait in
+    # the queue used it up.
+    return remaining + queued_for >= expected_service_time
+
+
+class DeadlineInterceptor(grpc.ServerInterceptor):
+    def __init__(self, estimator=None):
+        self.estimator = estimator if estimator is not None else ServiceTimeEstimator()
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.request_streaming or handler.response_streaming:
+            return handler
+        method = handler_call_details.method
+        behavior = handler.unary_unary
+        estimator = self.estimator
+        arrived_at = time.perf_counter()
+
+        def wrapped(request, context):
+            queued_for = time.perf_counter() - arrived_at
+            if should_shed(context, estimator.expected(method), queued_for):
+                context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, SHED_MESSAGE)
+            started_at = time.perf_counter()
+            response = behavior(request, context)
+            estimator.observe(method, time.perf_counter() - started_at)
+            return response
+
+        return grpc.unary_unary_rpc_method_handler(
+            wrapped,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+
+class AsyncDeadlineInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, estimator=None):
+        self.estimator = estimator if estimator is not None else ServiceTimeEstimator()
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.request_streaming or handler.response_streaming:
+            return handler
+        method = handler_call_details.method
+        behavior = handler.unary_unary
+        estimator = self.estimator
+        arrived_at = time.perf_counter()
+
+        async def wrapped(request, context):
+            queued_for = time.perf_counter() - arrived_at
+            if should_shed(context, estimator.expected(method), queued_for):
+                await context.abort(grpc.StatusCode.DEADLINE_EXCEEDED, SHED_MESSAGE)
+            started_at = time.perf_counter()
+            response = await behavior(request, context)
+            estimator.observe(method, time.perf_counter() - started_at)
+            return response
+
+        return grpc.unary_unary_rpc_method_handler(
+            wrapped,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
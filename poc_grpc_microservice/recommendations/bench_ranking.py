@@ -0,0 +1,54 @@
+"""Benchmark EmbeddingRanker on a large single-category catalog.
+
+    python -m poc_grpc_microservice.recommendations.bench_ranking --books 1000000
+"""
+import argparse
+import json
+import time
+import numpy as np
+from poc_grpc_microservice.recommendations.ranking import EmbeddingRanker
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ranker = EmbeddingRanker.random(args.users, {0: args.books}, dim=args.dim)
+    books = ranker.book_embeddings_by_category[0]
+    user_ids = np.arange(args.batch) % args.users
+
+    full_sort = timed(lambda: np.argsort(-(books @ ranker.user_embeddings[0]))[:args.k], args.repeat)
+    single = timed(lambda: ranker.top_k(0, 0, args.k), args.repeat)
+    batch = timed(lambda: ranker.top_k_batch(user_ids, 0, args.k), args.repeat)
+    looped = timed(lambda: [ranker.top_k(user_id, 0, args.k) for user_id in user_ids], 1)
+
+    result = {
+        "books": args.books,
+        "dim": args.dim,
+        "k": args.k,
+        "full_sort_ms": round(full_sort * 1000, 3),
+        "top_k_ms": round(single * 1000, 3),
+        "batch_size": args.batch,
+        "batch_ms": round(batch * 1000, 3),
+        "batch_users_per_s": round(args.batch / batch, 1),
+        "looped_users_per_s": round(args.batch / looped, 1),
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the thread pool server with the grpc.aio server.
+
+Each server runs in its own process; the load comes from a grpc.aio client
+keeping N Recommend calls in flight for a fixed duration.
+
+    python -m poc_grpc_microservice.recommendations.bench_server_modes
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+import grpc
+from poc_grpc_microservice.recommendations.harness import percentile
+from poc_grpc_microservice.recommendations.recommendations import serve, serve_async
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, RecommendationRequest
+
+
+def run_server(mode, port):
+    if mode == "aio":
+        asyncio.run(serve_async(port))
+    else:
+        serve(port)
+
+
+async def drive(port, concurrency, duration):
+    request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=3)
+    latencies = []
+    errors = 0
+
+    async with grpc.aio.insecure_channel(f"localhost:{port}") as channel:
+        await channel.channel_ready()
+        client = RecommendationsStub(channel)
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    await client.Recommend(request, timeout=10)
+                except grpc.aio.AioRpcError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["thread", "aio"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[10, 100, 1000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=50061)
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        server = multiprocessing.Process(target=run_server, args=(mode, args.port), daemon=True)
+        server.start()
+        try:
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(args.port, concurrency, args.duration))
+                result["mode"] = mode
+                results.append(result)
+                print(json.dumps(result))
+        finally:
+            server.terminate()
+            server.join()
+    return results
+
+
+if __name__ == "__main__":
+    main()
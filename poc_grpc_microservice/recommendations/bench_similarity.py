@@ -0,0 +1,56 @@
+"""Compare IVFIndex queries with brute-force cosine similarity.
+
+    python -m poc_grpc_microservice.recommendations.bench_similarity --books 1000000
+"""
+import argparse
+import json
+import time
+import numpy as np
+from poc_grpc_microservice.recommendations.similarity import IVFIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.books, args.dim), dtype=np.float32)
+    start = time.perf_counter()
+    index = IVFIndex.build(embeddings, np.arange(args.books), np.zeros(args.books), np.arange(args.books))
+    build_s = time.perf_counter() - start
+
+    queries = rng.choice(args.books, args.queries, replace=False)
+    start = time.perf_counter()
+    approximate = [index.similar(book_id, args.k, args.nprobe) for book_id in queries]
+    ivf_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    recall = 0
+    start = time.perf_counter()
+    for book_id, found in zip(queries, approximate):
+        row = index.row(book_id)
+        scores = index.vectors @ index.vectors[row]
+        scores[row] = -np.inf
+        exact = set(index.positions[np.argpartition(-scores, args.k)[:args.k]])
+        recall += len(exact & {position for _, position in found})
+    brute_force_ms = (time.perf_counter() - start) * 1000 / args.queries
+
+    result = {
+        "books": args.books,
+        "lists": len(index.centroids),
+        "nprobe": args.nprobe,
+        "build_s": round(build_s, 2),
+        "ivf_ms": round(ivf_ms, 3),
+        "brute_force_ms": round(brute_force_ms, 3),
+        "recall_at_k": round(recall / (args.k * args.queries), 3),
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
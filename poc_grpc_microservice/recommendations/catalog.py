@@ -0,0 +1,179 @@
+"""Book catalogs backing the Recommendations service.
+
+``InMemoryCatalog`` wraps the hard-coded ``books_by_category`` protobuf
+lists. ``MappedCatalog`` reads a compact file written by ``build_catalog``
+through mmap, so a catalog with tens of millions of books opens instantly
+and every worker process shares the same page cache pages.
+
+File layout (little endian, every section 8-byte aligned)::
+
+    header          magic, version, category count, book count
+    category table  (category, first book, book count) per category
+    ids             int32 per book, grouped by category
+    title offsets   uint64 per book + 1, into the titles blob
+    titles          utf-8 titles back to back
+
+Build one from a ``category,id,title`` CSV (category by enum name)::
+
+    python -m poc_grpc_microservice.recommendations.catalog books.csv catalog.bin
+"""
+import csv
+import mmap
+import random
+import struct
+import sys
+from array import array
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BookRecommendation
+
+
+MAGIC = b"BOOKCAT\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+CATEGORY_ENTRY = struct.Struct("<i4xQQ")
+
+if sys.byteorder != "little":
+    raise ImportError("MappedCatalog reads the catalog in native byte order and needs a little endian host")
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+class InMemoryCatalog(object):
+    def __init__(self, books_by_category):
+        self.books_by_category = books_by_category
+
+    def __contains__(self, category):
+        return category in self.books_by_category
+
+    def __len__(self):
+        return sum(len(books) for books in self.books_by_category.values())
+
+    def categories(self):
+        return list(self.books_by_category)
+
+    def count(self, category):
+        return len(self.books_by_category[category])
+
+    def books(self, category):
+        return list(self.books_by_category[category])
+
+    def ids(self, category):
+        return [book.id for book in self.books_by_category[category]]
+
+    def books_at(self, category, positions):
+        books_for_category = self.books_by_category[category]
+        return [books_for_category[position] for position in positions]
+
+    def sample(self, category, num_results, rng=random):
+        books_for_category = self.books_by_category[category]
+        num_results = max(0, min(num_results, len(books_for_category)))
+        return rng.sample(books_for_category, num_results)
+
+
+class MappedCatalog(object):
+    def __init__(self, path):
+        with open(path, "rb") as catalog_file:
+            self._mmap = mmap.mmap(catalog_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, num_categories, num_books = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} book catalog")
+
+        self._ranges = {}
+        offset = HEADER.size
+        for _ in range(num_categories):
+            category, start, count = CATEGORY_ENTRY.unpack_from(self._mmap, offset)
+            self._ranges[category] = (start, count)
+            offset += CATEGORY_ENTRY.size
+
+        # Zero-copy views over the mapping; only touched pages are read.
+        view = memoryview(self._mmap)
+        ids_offset = _align(offset)
+        offsets_offset = _align(ids_offset + 4 * num_books)
+        titles_offset = offsets_offset + 8 * (num_books + 1)
+        self._ids = view[ids_offset:ids_offset + 4 * num_books].cast("i")
+        self._title_offsets = view[offsets_offset:titles_offset].cast("Q")
+        self._titles = view[titles_offset:]
+        self._num_books = num_books
+
+    def __contains__(self, category):
+        return category in self._ranges
+
+    def __len__(self):
+        return self._num_books
+
+    def categories(self):
+        return list(self._ranges)
+
+    def count(self, category):
+        return self._ranges[category][1]
+
+    def book(self, index):
+        start, end = self._title_offsets[index], self._title_offsets[index + 1]
+        title = str(self._titles[start:end], "utf-8")
+        return BookRecommendation(id=self._ids[index], title=title)
+
+    def books(self, category):
+        start, count = self._ranges[category]
+        return [self.book(index) for index in range(start, start + count)]
+
+    def ids(self, category):
+        start, count = self._ranges[category]
+        return self._ids[start:start + count]
+
+    def books_at(self, category, positions):
+        start, count = self._ranges[category]
+        return [self.book(start + int(position)) for position in positions]
+
+    def sample(self, category, num_results, rng=random):
+        start, count = self._ranges[category]
+        indexes = rng.sample(range(start, start + count), max(0, min(num_results, count)))
+        return [self.book(index) for index in indexes]
+
+    def close(self):
+        self._ids.release()
+        self._title_offsets.release()
+        self._titles.release()
+        self._mmap.close()
+
+
+def build_catalog(path, books):
+    """Write ``books``, an iterable of (category, id, title), to ``path``."""
+    grouped = {}
+    for category, book_id, title in books:
+        grouped.setdefault(int(category), []).append((book_id, title))
+
+    ids = array("i")
+    title_offsets = array("Q", [0])
+    titles = bytearray()
+    category_table = bytearray()
+    for category in sorted(grouped):
+        category_table += CATEGORY_ENTRY.pack(category, len(ids), len(grouped[category]))
+        for book_id, title in grouped[category]:
+            ids.append(book_id)
+            titles += title.encode("utf-8")
+            title_offsets.append(len(titles))
+
+    with open(path, "wb") as catalog_file:
+        catalog_file.write(HEADER.pack(MAGIC, VERSION, len(grouped), len(ids)))
+        catalog_file.write(category_table)
+        _pad(catalog_file)
+        ids.tofile(catalog_file)
+        _pad(catalog_file)
+        title_offsets.tofile(catalog_file)
+        catalog_file.write(titles)
+
+
+def _pad(catalog_file):
+    position = catalog_file.tell()
+    catalog_file.write(b"\0" * (_align(position) - position))
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as csv_file:
+        for category, book_id, title in csv.reader(csv_file):
+            yield BookCategory.Value(category), int(book_id), title
+
+
+if __name__ == "__main__":
+    build_catalog(sys.argv[2], read_csv(sys.argv[1]))
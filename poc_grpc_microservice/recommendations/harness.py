@@ -0,0 +1,47 @@
+"""Helpers shared by the load generator, the benchmarks and the tests."""
+import asyncio
+import contextlib
+import socket
+from threading import Thread
+from poc_grpc_microservice.recommendations.recommendations import create_async_server
+
+
+def get_free_port():
+    """A port that was free a moment ago, for servers that cannot bind :0
+    and report their port back, such as subprocesses."""
+    s = socket.socket(socket.AF_INET, type=socket.SOCK_STREAM)
+    s.bind(('localhost', 0))
+    address, port = s.getsockname()
+    s.close()
+    return port
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+@contextlib.contextmanager
+def running_async_server(**kwargs):
+    """Run ``create_async_server(**kwargs)`` on an event loop in a background
+    thread, yield its port and stop the server and the loop afterwards."""
+    loop = asyncio.new_event_loop()
+    loop_thread = Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+
+    async def start():
+        server = create_async_server(None, **kwargs)
+        port = server.add_insecure_port("localhost:0")
+        await server.start()
+        return server, port
+
+    server, port = asyncio.run_coroutine_threadsafe(start(), loop).result()
+    try:
+        yield port
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(None), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
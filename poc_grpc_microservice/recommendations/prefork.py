@@ -0,0 +1,113 @@
+"""Pre-fork launcher running one Recommendations server per core.
+
+Every worker binds the same port with SO_REUSEPORT and the kernel spreads
+incoming connections across them. The parent process never touches gRPC
+itself: it only forks the workers, restarts the ones that die and forwards
+SIGTERM/SIGINT to them for a graceful shutdown.
+
+    RECOMMENDATIONS_WORKERS=32 python -m poc_grpc_microservice.recommendations.prefork
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from poc_grpc_microservice.recommendations.recommendations import create_async_server, create_server
+
+
+REUSEPORT_OPTIONS = (("grpc.so_reuseport", 1),)
+GRACE_PERIOD = 5
+
+
+def run_worker(port, mode="thread", grace=GRACE_PERIOD):
+    # The parent handles Ctrl-C and forwards SIGTERM, workers only drain.
+    # The forked worker inherits the parent's SIGTERM handler, so until the
+    # server is up a SIGTERM simply ends the worker.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    if mode == "aio":
+        asyncio.run(_run_async_worker(port, grace))
+        return
+
+    server = create_server(port, options=REUSEPORT_OPTIONS)
+    server.start()
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.stop(grace))
+    server.wait_for_termination()
+
+
+async def _run_async_worker(port, grace):
+    server = create_async_server(port, options=REUSEPORT_OPTIONS)
+    await server.start()
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGTERM, lambda: asyncio.ensure_future(server.stop(grace))
+    )
+    await server.wait_for_termination()
+
+
+class PreforkServer(object):
+    """Keep ``num_workers`` copies of ``target`` alive until stopped."""
+
+    def __init__(self, num_workers, target=run_worker, args=(), grace=GRACE_PERIOD,
+                 restart_delay=0.5, poll_interval=0.2):
+        self.num_workers = num_workers
+        self.target = target
+        self.args = args
+        self.grace = grace
+        self.restart_delay = restart_delay
+        self.poll_interval = poll_interval
+        self.workers = []
+        self._context = multiprocessing.get_context("fork")
+        self._stopping = threading.Event()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: self.stop())
+        self.supervise()
+
+    def supervise(self):
+        self.workers = [self._spawn() for _ in range(self.num_workers)]
+        while not self._stopping.wait(self.poll_interval):
+            for index, worker in enumerate(self.workers):
+                if worker.is_alive():
+                    continue
+                logging.warning(f"worker {worker.pid} exited with {worker.exitcode}, restarting")
+                worker.join()
+                # Avoid a hot crash loop when a worker dies at startup.
+                time.sleep(self.restart_delay)
+                if self._stopping.is_set():
+                    break
+                self.workers[index] = self._spawn()
+        self._shutdown()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _spawn(self):
+        worker = self._context.Process(target=self.target, args=self.args, daemon=True)
+        worker.start()
+        return worker
+
+    def _shutdown(self):
+        for worker in self.workers:
+            if worker.is_alive():
+                worker.terminate()
+        deadline = time.monotonic() + self.grace + 1
+        for worker in self.workers:
+            worker.join(max(0, deadline - time.monotonic()))
+            if worker.is_alive():
+                worker.kill()
+                worker.join()
+
+
+def main():
+    num_workers = int(os.getenv("RECOMMENDATIONS_WORKERS", os.cpu_count()))
+    port = int(os.getenv("RECOMMENDATIONS_PORT", 50051))
+    mode = os.getenv("RECOMMENDATIONS_SERVER_MODE", "thread")
+    logging.basicConfig(level=logging.INFO)
+    PreforkServer(num_workers, args=(port, mode)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Personalized ranking from user and book embeddings.
+
+A category is scored for a user with one matrix-vector product and the top
+``k`` books are picked with ``argpartition`` (O(n) instead of a full sort).
+``top_k_batch`` scores many users with one matrix-matrix product per chunk.
+
+Book rows are stored per category in catalog order, so the positions
+returned here index into ``catalog.books_at(category, positions)``.
+"""
+import numpy as np
+
+
+# Upper bound on the (users x books) score matrix built by top_k_batch.
+MAX_BATCH_SCORES = 1 << 24
+
+
+class EmbeddingRanker(object):
+    def __init__(self, user_embeddings, book_embeddings_by_category):
+        self.user_embeddings = np.ascontiguousarray(user_embeddings, dtype=np.float32)
+        self.book_embeddings_by_category = {
+            category: np.ascontiguousarray(book_embeddings, dtype=np.float32)
+            for category, book_embeddings in book_embeddings_by_category.items()
+        }
+
+    @classmethod
+    def random(cls, num_users, books_per_category, dim=32, seed=0):
+        rng = np.random.default_rng(seed)
+        user_embeddings = rng.standard_normal((num_users, dim), dtype=np.float32)
+        book_embeddings_by_category = {
+            category: rng.standard_normal((num_books, dim), dtype=np.float32)
+            for category, num_books in books_per_category.items()
+        }
+        return cls(user_embeddings, book_embeddings_by_category)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as embeddings:
+            book_embeddings_by_category = {
+                int(name[len("category_"):]): embeddings[name]
+                for name in embeddings.files if name.startswith("category_")
+            }
+            return cls(embeddings["users"], book_embeddings_by_category)
+
+    def save(self, path):
+        np.savez(path, users=self.user_embeddings, **{
+            f"category_{category}": book_embeddings
+            for category, book_embeddings in self.book_embeddings_by_category.items()
+        })
+
+    def knows(self, user_id, category):
+        return 0 <= user_id < len(self.user_embeddings) and category in self.book_embeddings_by_category
+
+    def top_k(self, user_id, category, k):
+        book_embeddings = self.book_embeddings_by_category[category]
+        scores = book_embeddings @ self.user_embeddings[user_id]
+        return _top_k_rows(scores[np.newaxis, :], k)[0]
+
+    def top_k_batch(self, user_ids, category, k):
+        """Return a (len(user_ids), k) array of book positions, best first."""
+        book_embeddings = self.book_embeddings_by_category[category]
+        user_ids = np.asarray(user_ids, dtype=np.intp)
+        k = max(0, min(k, len(book_embeddings)))
+        positions = np.empty((len(user_ids), k), dtype=np.intp)
+        chunk = max(1, MAX_BATCH_SCORES // max(1, len(book_embeddings)))
+        for start in range(0, len(user_ids), chunk):
+            users = self.user_embeddings[user_ids[start:start + chunk]]
+            positions[start:start + chunk] = _top_k_rows(users @ book_embeddings.T, k)
+        return positions
+
+
+def _top_k_rows(scores, k):
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
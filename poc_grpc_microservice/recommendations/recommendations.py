@@ -1,8 +1,16 @@
+import asyncio
+import os
 import random
 import grpc
 from concurrent import futures
-from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsServicer, add_RecommendationsServicer_to_server
-from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BookRecommendation, RecommendationResponse
+from poc_grpc_microservice.recommendations.admission import MAX_ASYNC_CONCURRENT_RPCS, MAX_QUEUED_RPCS, MAX_WORKERS, AsyncDeadlineInterceptor, DeadlineInterceptor
+from poc_grpc_microservice.recommendations.catalog import InMemoryCatalog, MappedCatalog
+from poc_grpc_microservice.recommendations.ranking import EmbeddingRanker
+from poc_grpc_microservice.recommendations.response_cache import ResponseCache, serialize_response
+from poc_grpc_microservice.recommendations.similarity import IVFIndex
+from poc_grpc_microservice.recommendations.stats import AsyncStatsInterceptor, ServerStats, StatsInterceptor, start_stats_http_server
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsServicer
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BookRecommendation, RecommendationRequest, RecommendationResponse, BatchRecommendationRequest, BatchRecommendationResponse, SimilarBooksRequest
 
 
 books_by_category = {
@@ -29,30 +37,336 @@ books_by_category = {
     ],
 }
 
+# Books per BrowseCategory response message.
+BROWSE_CHUNK_SIZE = 20
+
+
+def load_catalog():
+    # RECOMMENDATIONS_CATALOG points at a file written by catalog.build_catalog.
+    catalog_path = os.getenv("RECOMMENDATIONS_CATALOG")
+    if catalog_path:
+        return MappedCatalog(catalog_path)
+    return InMemoryCatalog(books_by_category)
+
+
+def load_ranker():
+    # RECOMMENDATIONS_EMBEDDINGS points at a file written by EmbeddingRanker.save,
+    # without it recommendations stay random samples.
+    embeddings_path = os.getenv("RECOMMENDATIONS_EMBEDDINGS")
+    if embeddings_path:
+        return EmbeddingRanker.load(embeddings_path)
+    return None
+
+
+def check_ranker(catalog, ranker):
+    # Ranked positions are used as offsets into the catalog category, so an
+    # embeddings file built for another catalog would return the wrong books
+    # or read past the end of the category.
+    if ranker is None:
+        return
+    for category, book_embeddings in ranker.book_embeddings_by_category.items():
+        if category not in catalog:
+            raise ValueError(f"Ranker has embeddings for category {category}, which is not in the catalog")
+        if len(book_embeddings) != catalog.count(category):
+            raise ValueError(
+                f"Ranker has {len(book_embeddings)} books for category {category}, "
+                f"the catalog has {catalog.count(category)}"
+            )
+
+
+def load_similarity_index():
+    # RECOMMENDATIONS_SIMILARITY_INDEX points at a file written by IVFIndex.save.
+    index_path = os.getenv("RECOMMENDATIONS_SIMILARITY_INDEX")
+    if index_path:
+        return IVFIndex.load(index_path)
+    return None
+
 
 class RecommendationService(RecommendationsServicer):
+    def __init__(self, catalog=None, ranker=None, response_cache=None, similarity_index=None):
+        self.catalog = catalog if catalog is not None else load_catalog()
+        self.ranker = ranker if ranker is not None else load_ranker()
+        check_ranker(self.catalog, self.ranker)
+        self.similarity_index = similarity_index if similarity_index is not None else load_similarity_index()
+        # With a ResponseCache handlers return pre-encoded bytes, which only
+        # servers registered through add_service_to_server can send.
+        self.response_cache = response_cache
+
     def Recommend(self, request, context):
-        if request.category not in books_by_category:
+        return self._recommend(request, context)
+
+    def BatchRecommend(self, request, context):
+        # One round trip for many users/categories: the channel and per-call
+        # overhead is paid once per batch instead of once per request.
+        for recommendation_request in request.requests:
+            if recommendation_request.category not in self.catalog:
+                context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
+        return recommend_batch(self.catalog, self.ranker, request.requests, self.response_cache)
+
+    def RecommendStream(self, request, context):
+        # Same input as BatchRecommend, but each response is sent as soon as
+        # it is ready so the client can start consuming before the batch ends.
+        for recommendation_request in request.requests:
+            yield self._recommend(recommendation_request, context)
+
+    def SimilarBooks(self, request, context):
+        if self.similarity_index is None:
+            context.abort(grpc.StatusCode.UNIMPLEMENTED, "Similarity index not loaded")
+        if self.similarity_index.row(request.book_id) is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Book not found")
+
+        return similar_books(self.catalog, self.similarity_index, request, self.response_cache)
+
+    def BrowseCategory(self, request, context):
+        if request.category not in self.catalog:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
+
+        yield from browse_chunks(select_books(self.catalog, self.ranker, request))
+
+    def _recommend(self, request, context):
+        if request.category not in self.catalog:
             context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
 
-        books_for_category = books_by_category[request.category]
-        num_results = min(request.max_results, len(books_for_category))
-        books_to_recommend = random.sample(
-            books_for_category, num_results
+        return recommend(self.catalog, self.ranker, request, self.response_cache)
+
+
+class AsyncRecommendationService(RecommendationsServicer):
+    """grpc.aio flavour of RecommendationService.
+
+    Handlers run as coroutines on a single event loop, so the number of
+    concurrent RPCs is not capped by a thread pool size.
+    """
+
+    def __init__(self, catalog=None, ranker=None, response_cache=None, similarity_index=None):
+        self.catalog = catalog if catalog is not None else load_catalog()
+        self.ranker = ranker if ranker is not None else load_ranker()
+        check_ranker(self.catalog, self.ranker)
+        self.similarity_index = similarity_index if similarity_index is not None else load_similarity_index()
+        self.response_cache = response_cache
+
+    async def Recommend(self, request, context):
+        return await self._recommend(request, context)
+
+    async def BatchRecommend(self, request, context):
+        for recommendation_request in request.requests:
+            if recommendation_request.category not in self.catalog:
+                await context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
+        return recommend_batch(self.catalog, self.ranker, request.requests, self.response_cache)
+
+    async def RecommendStream(self, request, context):
+        for recommendation_request in request.requests:
+            yield await self._recommend(recommendation_request, context)
+
+    async def SimilarBooks(self, request, context):
+        if self.similarity_index is None:
+            await context.abort(grpc.StatusCode.UNIMPLEMENTED, "Similarity index not loaded")
+        if self.similarity_index.row(request.book_id) is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Book not found")
+
+        return similar_books(self.catalog, self.similarity_index, request, self.response_cache)
+
+    async def BrowseCategory(self, request, context):
+        if request.category not in self.catalog:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
+
+        for chunk in browse_chunks(select_books(self.catalog, self.ranker, request)):
+            yield chunk
+
+    async def _recommend(self, request, context):
+        if request.category not in self.catalog:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Category not found")
+
+        return recommend(self.catalog, self.ranker, request, self.response_cache)
+
+
+def select_books(catalog, ranker, request):
+    if ranker is not None and ranker.knows(request.user_id, request.category):
+        positions = ranker.top_k(request.user_id, request.category, request.max_results)
+        return catalog.books_at(request.category, positions)
+    if request.seed:
+        return catalog.sample(request.category, request.max_results, rng=random.Random(request.seed))
+    return catalog.sample(request.category, request.max_results)
+
+
+def select_books_batch(catalog, ranker, requests):
+    """Books for each of ``requests``, scoring known users per category in bulk."""
+    books_per_request = [None] * len(requests)
+    ranked_by_category = {}
+    for index, request in enumerate(requests):
+        if ranker is not None and ranker.knows(request.user_id, request.category):
+            ranked_by_category.setdefault(request.category, []).append(index)
+        else:
+            books_per_request[index] = select_books(catalog, None, request)
+
+    for category, indexes in ranked_by_category.items():
+        user_ids = [requests[index].user_id for index in indexes]
+        max_results = max(requests[index].max_results for index in indexes)
+        top_positions = ranker.top_k_batch(user_ids, category, max_results)
+        for index, positions in zip(indexes, top_positions):
+            positions = positions[:max(0, requests[index].max_results)]
+            books_per_request[index] = catalog.books_at(category, positions)
+    return books_per_request
+
+
+def response_cache_key(ranker, request):
+    # Only deterministic answers may be served again from the cache.
+    if ranker is not None and ranker.knows(request.user_id, request.category):
+        return ("ranked", request.user_id, request.category, request.max_results)
+    if request.seed:
+        return ("sampled", request.category, request.max_results, request.seed)
+    return None
+
+
+def recommend(catalog, ranker, request, response_cache=None):
+    if response_cache is not None:
+        return response_cache.response(
+            response_cache_key(ranker, request),
+            lambda: select_books(catalog, ranker, request),
+        )
+    books_to_recommend = select_books(catalog, ranker, request)
+    return RecommendationResponse(recommendations=books_to_recommend)
+
+
+def recommend_batch(catalog, ranker, requests, response_cache=None):
+    books_per_request = select_books_batch(catalog, ranker, requests)
+    if response_cache is not None:
+        return response_cache.encode_responses(
+            response_cache.encode_books(books) for books in books_per_request
         )
+    return BatchRecommendationResponse(responses=[
+        RecommendationResponse(recommendations=books) for books in books_per_request
+    ])
+
+
+def select_similar_books(catalog, similarity_index, request):
+    return [
+        catalog.books_at(category, [position])[0]
+        for category, position in similarity_index.similar(request.book_id, request.k)
+    ]
+
+
+def similar_books(catalog, similarity_index, request, response_cache=None):
+    if response_cache is not None:
+        return response_cache.response(
+            ("similar", request.book_id, request.k),
+            lambda: select_similar_books(catalog, similarity_index, request),
+        )
+    books_to_recommend = select_similar_books(catalog, similarity_index, request)
+    return RecommendationResponse(recommendations=books_to_recommend)
+
+
+def browse_chunks(books, chunk_size=None):
+    """Split a long recommendation list into responses of ``chunk_size``
+    books so the client can render the first ones while the rest are sent."""
+    if chunk_size is None:
+        chunk_size = BROWSE_CHUNK_SIZE
+    for start in range(0, len(books), chunk_size):
+        yield RecommendationResponse(recommendations=books[start:start + chunk_size])
+
 
-        return RecommendationResponse(recommendations=books_to_recommend)
+def add_service_to_server(servicer, server):
+    """Same as the generated add_RecommendationsServicer_to_server, except
+    that handlers may also return pre-encoded response bytes."""
+    rpc_method_handlers = {
+        "Recommend": grpc.unary_unary_rpc_method_handler(
+            servicer.Recommend,
+            request_deserializer=RecommendationRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+        "BatchRecommend": grpc.unary_unary_rpc_method_handler(
+            servicer.BatchRecommend,
+            request_deserializer=BatchRecommendationRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+        "RecommendStream": grpc.unary_stream_rpc_method_handler(
+            servicer.RecommendStream,
+            request_deserializer=BatchRecommendationRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+        "SimilarBooks": grpc.unary_unary_rpc_method_handler(
+            servicer.SimilarBooks,
+            request_deserializer=SimilarBooksRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+        "BrowseCategory": grpc.unary_stream_rpc_method_handler(
+            servicer.BrowseCategory,
+            request_deserializer=RecommendationRequest.FromString,
+            response_serializer=serialize_response,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+        "Recommendations", rpc_method_handlers
+    )
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+def create_server(port=50051, options=(), stats=None, servicer=None,
+                  max_workers=MAX_WORKERS, max_queued_rpcs=MAX_QUEUED_RPCS):
+    # Stats come first so that shed and rejected-by-deadline calls are counted.
+    interceptors = [StatsInterceptor(stats)] if stats is not None else []
+    interceptors.append(DeadlineInterceptor())
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=max_workers),
+        options=options,
+        interceptors=interceptors,
+        maximum_concurrent_rpcs=max_workers + max_queued_rpcs,
+    )
+    if servicer is None:
+        servicer = RecommendationService(response_cache=ResponseCache())
+    add_service_to_server(servicer, server)
+    # With port=None the caller binds the server itself, e.g. to localhost:0.
+    if port is not None:
+        server.add_insecure_port(f"[::]:{port}")
+    return server
 
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    add_RecommendationsServicer_to_server(
-        RecommendationService(), server
+def create_async_server(port=50051, options=(), stats=None, servicer=None,
+                        max_concurrent_rpcs=MAX_ASYNC_CONCURRENT_RPCS):
+    interceptors = [AsyncStatsInterceptor(stats)] if stats is not None else []
+    interceptors.append(AsyncDeadlineInterceptor())
+    server = grpc.aio.server(
+        options=options,
+        interceptors=interceptors,
+        maximum_concurrent_rpcs=max_concurrent_rpcs,
     )
-    server.add_insecure_port("[::]:50051")
+    if servicer is None:
+        servicer = AsyncRecommendationService(response_cache=ResponseCache())
+    add_service_to_server(servicer, server)
+    if port is not None:
+        server.add_insecure_port(f"[::]:{port}")
+    return server
+
+
+def load_stats():
+    # RECOMMENDATIONS_STATS_PORT exposes per-RPC stats as JSON on GET /stats.
+    stats_port = os.getenv("RECOMMENDATIONS_STATS_PORT")
+    if not stats_port:
+        return None
+    stats = ServerStats()
+    start_stats_http_server(stats, int(stats_port))
+    return stats
+
+
+def serve(port=50051):
+    server = create_server(port, stats=load_stats())
     server.start()
     server.wait_for_termination()
 
 
+async def serve_async(port=50051):
+    server = create_async_server(port, stats=load_stats())
+    await server.start()
+    await server.wait_for_termination()
+
+
+def main():
+    # RECOMMENDATIONS_SERVER_MODE=aio selects the asyncio server,
+    # anything else keeps the thread pool server.
+    if os.getenv("RECOMMENDATIONS_SERVER_MODE", "thread") == "aio":
+        asyncio.run(serve_async())
+    else:
+        serve()
+
+
 if __name__ == "__main__":
-    serve()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -19,6 +19,26 @@ class RecommendationsStub(object):
                 request_serializer=recommendations__pb2.RecommendationRequest.SerializeToString,
                 response_deserializer=recommendations__pb2.RecommendationResponse.FromString,
                 )
+        self.BatchRecommend = channel.unary_unary(
+                '/Recommendations/BatchRecommend',
+                request_serializer=recommendations__pb2.BatchRecommendationRequest.SerializeToString,
+                response_deserializer=recommendations__pb2.BatchRecommendationResponse.FromString,
+                )
+        self.RecommendStream = channel.unary_stream(
+                '/Recommendations/RecommendStream',
+                request_serializer=recommendations__pb2.BatchRecommendationRequest.SerializeToString,
+                response_deserializer=recommendations__pb2.RecommendationResponse.FromString,
+                )
+        self.SimilarBooks = channel.unary_unary(
+                '/Recommendations/SimilarBooks',
+                request_serializer=recommendations__pb2.SimilarBooksRequest.SerializeToString,
+                response_deserializer=recommendations__pb2.RecommendationResponse.FromString,
+                )
+        self.BrowseCategory = channel.unary_stream(
+                '/Recommendations/BrowseCategory',
+                request_serializer=recommendations__pb2.RecommendationRequest.SerializeToString,
+                response_deserializer=recommendations__pb2.RecommendationResponse.FromString,
+                )
 
 
 class RecommendationsServicer(object):
@@ -30,6 +50,31 @@ class RecommendationsServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchRecommend(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RecommendStream(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def SimilarBooks(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BrowseCategory(self, request, context):
+        """One long list sent in chunks, for pages that render as books arrive.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_RecommendationsServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -38,6 +83,26 @@ def add_RecommendationsServicer_to_server(servicer, server):
                     request_deserializer=recommendations__pb2.RecommendationRequest.FromString,
                     response_serializer=recommendations__pb2.RecommendationResponse.SerializeToString,
             ),
+            'BatchRecommend': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchRecommend,
+                    request_deserializer=recommendations__pb2.BatchRecommendationRequest.FromString,
+                    response_serializer=recommendations__pb2.BatchRecommendationResponse.SerializeToString,
+            ),
+            'RecommendStream': grpc.unary_stream_rpc_method_handler(
+                    servicer.RecommendStream,
+                    request_deserializer=recommendations__pb2.BatchRecommendationRequest.FromString,
+                    response_serializer=recommendations__pb2.RecommendationResponse.SerializeToString,
+            ),
+            'SimilarBooks': grpc.unary_unary_rpc_method_handler(
+                    servicer.SimilarBooks,
+                    request_deserializer=recommendations__pb2.SimilarBooksRequest.FromString,
+                    response_serializer=recommendations__pb2.RecommendationResponse.SerializeToString,
+            ),
+            'BrowseCategory': grpc.unary_stream_rpc_method_handler(
+                    servicer.BrowseCategory,
+                    request_deserializer=recommendations__pb2.RecommendationRequest.FromString,
+                    response_serializer=recommendations__pb2.RecommendationResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'Recommendations', rpc_method_handlers)
@@ -64,3 +129,71 @@ class Recommendations(object):
             recommendations__pb2.RecommendationResponse.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def BatchRecommend(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Recommendations/BatchRecommend',
+            recommendations__pb2.BatchRecommendationRequest.SerializeToString,
+            recommendations__pb2.BatchRecommendationResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def RecommendStream(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Recommendations/RecommendStream',
+            recommendations__pb2.BatchRecommendationRequest.SerializeToString,
+            recommendations__pb2.RecommendationResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def SimilarBooks(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/Recommendations/SimilarBooks',
+            recommendations__pb2.SimilarBooksRequest.SerializeToString,
+            recommendations__pb2.RecommendationResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def BrowseCategory(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/Recommendations/BrowseCategory',
+            recommendations__pb2.RecommendationRequest.SerializeToString,
+            recommendations__pb2.RecommendationResponse.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -0,0 +1,92 @@
+"""Pre-serialized Recommendations responses.
+
+``RecommendationResponse`` is just ``repeated BookRecommendation = 1``, so
+its wire format is the concatenation of one length-delimited field per
+book. ``ResponseCache`` keeps that field encoding per book and assembles
+responses with ``bytes.join`` instead of building and serializing protobuf
+messages. Responses that are deterministic (seeded samples and ranked
+results) are additionally kept whole in an LRU.
+
+Handlers return the bytes as-is; ``serialize_response`` is registered as the
+response serializer so gRPC sends them without re-encoding.
+"""
+import threading
+from collections import OrderedDict
+
+
+# Field 1, wire type 2 (length delimited), for both response messages.
+FIELD_1_TAG = b"\x0a"
+
+
+def encode_varint(value):
+    encoded = bytearray()
+    while value > 0x7F:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def encode_field(payload):
+    return FIELD_1_TAG + encode_varint(len(payload)) + payload
+
+
+def serialize_response(response):
+    if isinstance(response, bytes):
+        return response
+    return response.SerializeToString()
+
+
+class LRUCache(object):
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class ResponseCache(object):
+    def __init__(self, max_books=100_000, max_responses=10_000):
+        self._books = LRUCache(max_books)
+        self._responses = LRUCache(max_responses)
+
+    def book_field(self, book):
+        field = self._books.get(book.id)
+        if field is None:
+            field = encode_field(book.SerializeToString())
+            self._books.put(book.id, field)
+        return field
+
+    def encode_books(self, books):
+        """Wire bytes of ``RecommendationResponse(recommendations=books)``."""
+        return b"".join(self.book_field(book) for book in books)
+
+    def encode_responses(self, encoded_responses):
+        """Wire bytes of ``BatchRecommendationResponse`` from encoded responses."""
+        return b"".join(encode_field(response) for response in encoded_responses)
+
+    def response(self, key, select_books):
+        """Encoded response for ``key``; ``key=None`` means not cacheable."""
+        if key is None:
+            return self.encode_books(select_books())
+        encoded = self._responses.get(key)
+        if encoded is None:
+            encoded = self.encode_books(select_books())
+            self._responses.put(key, encoded)
+        return encoded
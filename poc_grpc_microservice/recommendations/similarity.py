@@ -0,0 +1,165 @@
+"""Approximate nearest-neighbour index over book embeddings (NumPy only).
+
+``IVFIndex`` is an inverted file index: k-means picks ``num_lists`` coarse
+centroids, every book is filed under its nearest centroid and a query only
+scores the books in its ``nprobe`` closest lists instead of the whole
+catalog. Vectors are L2-normalised, so scores are cosine similarities.
+
+Rows remember the (category, position) of their book so results map back
+to the catalog with ``catalog.books_at``. Build an index from an
+``EmbeddingRanker.save`` file and the catalog selected by
+RECOMMENDATIONS_CATALOG::
+
+    python -m poc_grpc_microservice.recommendations.similarity embeddings.npz index.npz
+"""
+import sys
+import numpy as np
+
+
+class IVFIndex(object):
+    def __init__(self, centroids, list_offsets, vectors, book_ids, categories, positions):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.vectors = vectors
+        self.book_ids = book_ids
+        self.categories = categories
+        self.positions = positions
+        self._rows_by_id = np.argsort(book_ids, kind="stable")
+
+    @classmethod
+    def build(cls, embeddings, book_ids, categories, positions, num_lists=None,
+              iterations=10, training_size=256, seed=0):
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        if num_lists is None:
+            num_lists = max(1, int(np.sqrt(len(vectors))))
+        num_lists = min(num_lists, len(vectors))
+        centroids = _kmeans(vectors, num_lists, iterations, training_size * num_lists, seed)
+
+        lists = _nearest_centroid(vectors, centroids)
+        order = np.argsort(lists, kind="stable")
+        list_offsets = np.zeros(num_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=num_lists), out=list_offsets[1:])
+        return cls(
+            centroids,
+            list_offsets,
+            vectors[order],
+            np.asarray(book_ids, dtype=np.int64)[order],
+            np.asarray(categories, dtype=np.int32)[order],
+            np.asarray(positions, dtype=np.int64)[order],
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as index:
+            return cls(*(index[name] for name in (
+                "centroids", "list_offsets", "vectors", "book_ids", "categories", "positions"
+            )))
+
+    def save(self, path):
+        np.savez(
+            path,
+            centroids=self.centroids,
+            list_offsets=self.list_offsets,
+            vectors=self.vectors,
+            book_ids=self.book_ids,
+            categories=self.categories,
+            positions=self.positions,
+        )
+
+    def __len__(self):
+        return len(self.book_ids)
+
+    def row(self, book_id):
+        """Row of ``book_id`` in the index, or None if it is not indexed."""
+        candidate = np.searchsorted(self.book_ids, book_id, sorter=self._rows_by_id)
+        if candidate < len(self.book_ids):
+            row = self._rows_by_id[candidate]
+            if self.book_ids[row] == book_id:
+                return row
+        return None
+
+    def search(self, query, k, nprobe=8, exclude_row=None):
+        """Return (rows, scores) of the ``k`` best matches, best first."""
+        centroid_scores = self.centroids @ query
+        nprobe = min(nprobe, len(self.centroids))
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        rows = np.concatenate([
+            np.arange(self.list_offsets[list_id], self.list_offsets[list_id + 1])
+            for list_id in probed
+        ])
+        if exclude_row is not None:
+            rows = rows[rows != exclude_row]
+        scores = self.vectors[rows] @ query
+        k = min(k, len(rows))
+        if k <= 0:
+            return rows[:0], scores[:0]
+        if k < len(rows):
+            best = np.argpartition(-scores, k - 1)[:k]
+        else:
+            best = np.arange(len(rows))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return rows[best], scores[best]
+
+    def similar(self, book_id, k, nprobe=8):
+        """(category, position) of the ``k`` books most similar to ``book_id``."""
+        row = self.row(book_id)
+        if row is None:
+            raise KeyError(book_id)
+        rows, _ = self.search(self.vectors[row], k, nprobe, exclude_row=row)
+        return [(int(self.categories[r]), int(self.positions[r])) for r in rows]
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest_centroid(vectors, centroids, chunk=65536):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk):
+        scores = vectors[start:start + chunk] @ centroids.T
+        assignments[start:start + chunk] = np.argmax(scores, axis=1)
+    return assignments
+
+
+def _kmeans(vectors, num_lists, iterations, training_size, seed):
+    # Spherical k-means on a sample: centroids only need to be good enough
+    # to partition the space, not optimal.
+    rng = np.random.default_rng(seed)
+    if len(vectors) > training_size:
+        vectors = vectors[rng.choice(len(vectors), training_size, replace=False)]
+    centroids = vectors[rng.choice(len(vectors), num_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = _nearest_centroid(vectors, centroids)
+        counts = np.bincount(assignments, minlength=num_lists)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        filled = counts > 0
+        # Empty lists keep their previous centroid.
+        sums = centroids.copy()
+        sums[filled] = np.add.reduceat(
+            vectors[np.argsort(assignments, kind="stable")], starts[filled], axis=0
+        )
+        centroids = _normalize(sums)
+    return centroids
+
+
+def build_from_ranker(ranker, catalog, **kwargs):
+    embeddings, book_ids, categories, positions = [], [], [], []
+    for category, book_embeddings in ranker.book_embeddings_by_category.items():
+        embeddings.append(book_embeddings)
+        book_ids.append(np.asarray(catalog.ids(category), dtype=np.int64))
+        categories.append(np.full(len(book_embeddings), category, dtype=np.int32))
+        positions.append(np.arange(len(book_embeddings), dtype=np.int64))
+    return IVFIndex.build(
+        np.concatenate(embeddings),
+        np.concatenate(book_ids),
+        np.concatenate(categories),
+        np.concatenate(positions),
+        **kwargs
+    )
+
+
+if __name__ == "__main__":
+    from poc_grpc_microservice.recommendations.ranking import EmbeddingRanker
+    from poc_grpc_microservice.recommendations.recommendations import load_catalog
+    build_from_ranker(EmbeddingRanker.load(sys.argv[1]), load_catalog()).save(sys.argv[2])
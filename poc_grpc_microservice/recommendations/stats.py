@@ -0,0 +1,280 @@
+"""Per-RPC latency, size and status statistics for the Recommendations server.
+
+``StatsInterceptor`` (thread pool server) and ``AsyncStatsInterceptor``
+(grpc.aio server) time every handler and record into ``ServerStats``.
+Recording never takes a lock: every thread writes to its own shard and
+``ServerStats.snapshot`` merges the shards when somebody asks for them.
+Latencies go into fixed log-scale buckets, so percentiles are accurate to
+one bucket width (~19%).
+
+``start_stats_http_server`` serves the snapshot as JSON on ``GET /stats``::
+
+    RECOMMENDATIONS_STATS_PORT=9090 python -m poc_grpc_microservice.recommendations.recommendations
+    curl localhost:9090/stats
+"""
+import bisect
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import grpc
+
+
+# Bucket upper bounds in seconds: 50us * 2**(i/4), up to ~100s.
+LATENCY_BUCKETS = [50e-6 * 2 ** (i / 4) for i in range(84)]
+PERCENTILES = (0.50, 0.95, 0.99)
+
+
+class MethodStats(object):
+    __slots__ = ("latency_counts", "latency_sum", "started", "finished",
+                 "request_bytes", "response_bytes", "status_counts")
+
+    def __init__(self):
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.started = 0
+        self.finished = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status_counts = {}
+
+    def record(self, latency, code, request_bytes, response_bytes):
+        self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.latency_sum += latency
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.status_counts[code] = self.status_counts.get(code, 0) + 1
+        self.finished += 1
+
+    def merge(self, other):
+        for bucket, count in enumerate(other.latency_counts):
+            self.latency_counts[bucket] += count
+        self.latency_sum += other.latency_sum
+        self.started += other.started
+        self.finished += other.finished
+        self.request_bytes += other.request_bytes
+        self.response_bytes += other.response_bytes
+        for code, count in other.status_counts.items():
+            self.status_counts[code] = self.status_counts.get(code, 0) + count
+
+    def percentile(self, fraction):
+        target = fraction * self.finished
+        seen = 0
+        for bucket, count in enumerate(self.latency_counts):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS[min(bucket, len(LATENCY_BUCKETS) - 1)]
+        return 0.0
+
+    def as_dict(self):
+        stats = {
+            "count": self.finished,
+            "in_flight": self.started - self.finished,
+            "mean_ms": round(1000 * self.latency_sum / self.finished, 3) if self.finished else 0.0,
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "status": dict(self.status_counts),
+        }
+        for fraction in PERCENTILES:
+            stats[f"p{int(fraction * 100)}_ms"] = round(1000 * self.percentile(fraction), 3)
+        return stats
+
+
+class ServerStats(object):
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Only taken once per thread, never on the recording path.
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _method(self, method):
+        shard = self._shard()
+        method_stats = shard.get(method)
+        if method_stats is None:
+            method_stats = shard[method] = MethodStats()
+        return method_stats
+
+    def start(self, method):
+        self._method(method).started += 1
+        return time.perf_counter()
+
+    def finish(self, method, started_at, code, request_bytes, response_bytes):
+        latency = time.perf_counter() - started_at
+        self._method(method).record(latency, code, request_bytes, response_bytes)
+
+    def snapshot(self):
+        merged = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for method, method_stats in list(shard.items()):
+                merged.setdefault(method, MethodStats()).merge(method_stats)
+        return {method: method_stats.as_dict() for method, method_stats in sorted(merged.items())}
+
+
+def message_size(message):
+    if isinstance(message, bytes):
+        return len(message)
+    return message.ByteSize()
+
+
+def status_name(context, error=None):
+    code = context.code() if hasattr(context, "code") else None
+    if code is None:
+        return "UNKNOWN" if error is not None else "OK"
+    if isinstance(code, int):
+        code = next((status for status in grpc.StatusCode if status.value[0] == code), None)
+    return code.name if code is not None else "UNKNOWN"
+
+
+def _handler_factory(handler):
+    if handler.request_streaming and handler.response_streaming:
+        return grpc.stream_stream_rpc_method_handler, handler.stream_stream
+    if handler.request_streaming:
+        return grpc.stream_unary_rpc_method_handler, handler.stream_unary
+    if handler.response_streaming:
+        return grpc.unary_stream_rpc_method_handler, handler.unary_stream
+    return grpc.unary_unary_rpc_method_handler, handler.unary_unary
+
+
+class StatsInterceptor(grpc.ServerInterceptor):
+    def __init__(self, stats):
+        self.stats = stats
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = handler_call_details.method
+        factory, behavior = _handler_factory(handler)
+        stats = self.stats
+
+        # Streamed requests are counted as they are consumed.
+        def count_requests(requests, sizes):
+            for request in requests:
+                sizes[0] += message_size(request)
+                yield request
+
+        if handler.response_streaming:
+            def wrapped(request_or_iterator, context):
+                started_at = stats.start(method)
+                sizes = [0, 0]
+                if handler.request_streaming:
+                    request_or_iterator = count_requests(request_or_iterator, sizes)
+                else:
+                    sizes[0] = message_size(request_or_iterator)
+                error = None
+                try:
+                    for response in behavior(request_or_iterator, context):
+                        sizes[1] += message_size(response)
+                        yield response
+                except BaseException as exception:
+                    error = exception
+                    raise
+                finally:
+                    stats.finish(method, started_at, status_name(context, error), sizes[0], sizes[1])
+        else:
+            def wrapped(request_or_iterator, context):
+                started_at = stats.start(method)
+                sizes = [0, 0]
+                if handler.request_streaming:
+                    request_or_iterator = count_requests(request_or_iterator, sizes)
+                else:
+                    sizes[0] = message_size(request_or_iterator)
+                error = None
+                try:
+                    response = behavior(request_or_iterator, context)
+                    sizes[1] = message_size(response)
+                    return response
+                except BaseException as exception:
+                    error = exception
+                    raise
+                finally:
+                    stats.finish(method, started_at, status_name(context, error), sizes[0], sizes[1])
+
+        return factory(
+            wrapped,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+
+class AsyncStatsInterceptor(grpc.aio.ServerInterceptor):
+    def __init__(self, stats):
+        self.stats = stats
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.request_streaming:
+            return handler
+        method = handler_call_details.method
+        factory, behavior = _handler_factory(handler)
+        stats = self.stats
+
+        if handler.response_streaming:
+            async def wrapped(request, context):
+                started_at = stats.start(method)
+                response_bytes = 0
+                error = None
+                try:
+                    async for response in behavior(request, context):
+                        response_bytes += message_size(response)
+                        yield response
+                except BaseException as exception:
+                    error = exception
+                    raise
+                finally:
+                    stats.finish(method, started_at, status_name(context, error),
+                                 message_size(request), response_bytes)
+        else:
+            async def wrapped(request, context):
+                started_at = stats.start(method)
+                response_bytes = 0
+                error = None
+                try:
+                    response = await behavior(request, context)
+                    response_bytes = message_size(response)
+                    return response
+                except BaseException as exception:
+                    error = exception
+                    raise
+                finally:
+                    stats.finish(method, started_at, status_name(context, error),
+                                 message_size(request), response_bytes)
+
+        return factory(
+            wrapped,
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+
+
+def start_stats_http_server(stats, port):
+    class StatsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/stats":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(stats.snapshot()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    http_server = ThreadingHTTPServer(("", port), StatsRequestHandler)
+    http_server_thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    http_server_thread.start()
+    return http_server
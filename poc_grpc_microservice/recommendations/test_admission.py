@@ -0,0 +1,101 @@
+import time
+import grpc
+import pytest
+from poc_grpc_microservice.recommendations.admission import SHED_MESSAGE, ServiceTimeEstimator
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, RecommendationRequest
+
+
+REQUEST = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=1)
+
+
+class SlowRecommendationService(RecommendationService):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.calls = 0
+
+    def Recommend(self, request, context):
+        self.calls += 1
+        time.sleep(self.delay)
+        return super().Recommend(request, context)
+
+
+def start_server(servicer, **kwargs):
+    port = get_free_port()
+    server = create_server(port, servicer=servicer, **kwargs)
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    grpc.channel_ready_future(channel).result(timeout=10)
+    return server, channel
+
+
+def test_estimator_moving_average():
+    estimator = ServiceTimeEstimator(alpha=0.5)
+    assert estimator.expected("/m") == 0.0
+    estimator.observe("/m", 1.0)
+    estimator.observe("/m", 0.0)
+    assert estimator.expected("/m") == pytest.approx(0.5)
+
+
+def test_rejects_beyond_workers_and_queue():
+    server, channel = start_server(SlowRecommendationService(0.3), max_workers=1, max_queued_rpcs=1)
+    try:
+        client = RecommendationsStub(channel)
+        calls = [client.Recommend.future(REQUEST) for _ in range(4)]
+        codes = []
+        for call in calls:
+            try:
+                call.result()
+                codes.append(grpc.StatusCode.OK)
+            except grpc.RpcError as error:
+                codes.append(error.code())
+        assert codes.count(grpc.StatusCode.OK) == 2
+        assert codes.count(grpc.StatusCode.RESOURCE_EXHAUSTED) == 2
+    finally:
+        channel.close()
+        server.stop(None)
+
+
+def test_sheds_requests_that_waited_past_their_deadline():
+    servicer = SlowRecommendationService(0.2)
+    server, channel = start_server(servicer, max_workers=1)
+    try:
+        client = RecommendationsStub(channel)
+        # No deadline: always served, and teaches the server the service time.
+        client.Recommend(REQUEST)
+        assert servicer.calls == 1
+
+        # Long enough on arrival, but queued behind a 0.2s call.
+        busy = client.Recommend.future(REQUEST)
+        time.sleep(0.05)
+        with pytest.raises(grpc.RpcError) as error:
+            client.Recommend(REQUEST, timeout=0.3)
+        assert error.value.code() == grpc.StatusCode.DEADLINE_EXCEEDED
+        assert error.value.details() == SHED_MESSAGE
+        busy.result()
+        assert servicer.calls == 2
+
+        assert len(client.Recommend(REQUEST, timeout=5).recommendations) == 1
+    finally:
+        channel.close()
+        server.stop(None)
+
+
+def test_short_deadlines_recover_after_a_slow_call():
+    servicer = SlowRecommendationService(0.4)
+    server, channel = start_server(servicer)
+    try:
+        client = RecommendationsStub(channel)
+        client.Recommend(REQUEST)
+        # The estimate is now above the deadline below, but those calls did
+        # not wait in a queue, so they are served and pull it back down.
+        servicer.delay = 0.0
+        for _ in range(50):
+            assert len(client.Recommend(REQUEST, timeout=0.25).recommendations) == 1
+        assert servicer.calls == 51
+    finally:
+        channel.close()
+        server.stop(None)
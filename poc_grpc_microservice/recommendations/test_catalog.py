@@ -0,0 +1,48 @@
+import pytest
+from poc_grpc_microservice.recommendations.catalog import MappedCatalog, build_catalog
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, books_by_category
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, RecommendationRequest
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    path = tmp_path / "catalog.bin"
+    build_catalog(path, (
+        (category, book.id, book.title)
+        for category, books in books_by_category.items()
+        for book in books
+    ))
+    catalog = MappedCatalog(path)
+    yield catalog
+    catalog.close()
+
+
+def test_mapped_catalog_round_trip(catalog):
+    assert len(catalog) == 9
+    assert sorted(catalog.categories()) == sorted(books_by_category)
+    for category, books in books_by_category.items():
+        assert catalog.count(category) == len(books)
+        assert catalog.books(category) == books
+
+
+def test_mapped_catalog_sample(catalog):
+    books = catalog.sample(BookCategory.SCIENCE_FICTION, 10)
+    assert len(books) == 3
+    assert {book.id for book in books} == {4, 5, 6}
+    assert 42 not in catalog
+
+
+def test_mapped_catalog_unicode_titles(tmp_path):
+    path = tmp_path / "catalog.bin"
+    build_catalog(path, [(BookCategory.MYSTERY, 10, "Le Comte de Monte-Cristo é"), (BookCategory.MYSTERY, 11, "")])
+    catalog = MappedCatalog(path)
+    assert [book.title for book in catalog.books(BookCategory.MYSTERY)] == ["Le Comte de Monte-Cristo é", ""]
+    catalog.close()
+
+
+def test_service_with_mapped_catalog(catalog):
+    service = RecommendationService(catalog)
+    request = RecommendationRequest(user_id=1, category=BookCategory.SELF_HELP, max_results=2)
+    response = service.Recommend(request, context=None)
+    assert {book.id for book in response.recommendations} <= {7, 8, 9}
+    assert len(response.recommendations) == 2
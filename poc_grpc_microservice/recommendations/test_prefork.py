@@ -0,0 +1,53 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import grpc
+from threading import Thread
+from poc_grpc_microservice.recommendations.prefork import PreforkServer
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, RecommendationRequest
+from poc_grpc_microservice.recommendations.harness import get_free_port
+
+
+def wait_until(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_prefork_serves_and_shuts_down_gracefully():
+    port = get_free_port()
+    env = dict(os.environ, RECOMMENDATIONS_WORKERS="2", RECOMMENDATIONS_PORT=str(port))
+    launcher = subprocess.Popen(
+        [sys.executable, "-m", "poc_grpc_microservice.recommendations.prefork"], env=env
+    )
+    try:
+        with grpc.insecure_channel(f"localhost:{port}") as channel:
+            grpc.channel_ready_future(channel).result(timeout=10)
+            request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=3)
+            assert len(RecommendationsStub(channel).Recommend(request).recommendations) == 3
+        launcher.send_signal(signal.SIGTERM)
+        assert launcher.wait(timeout=15) == 0
+    finally:
+        if launcher.poll() is None:
+            launcher.kill()
+
+
+def test_prefork_restarts_crashed_workers():
+    launcher = PreforkServer(2, target=time.sleep, args=(60,), grace=0, restart_delay=0)
+    supervisor = Thread(target=launcher.supervise, daemon=True)
+    supervisor.start()
+    try:
+        assert wait_until(lambda: len(launcher.workers) == 2 and all(w.pid for w in launcher.workers))
+        crashed_pid = launcher.workers[0].pid
+        os.kill(crashed_pid, signal.SIGKILL)
+        assert wait_until(lambda: launcher.workers[0].pid != crashed_pid and launcher.workers[0].is_alive())
+    finally:
+        launcher.stop()
+        supervisor.join(timeout=10)
+    assert not any(worker.is_alive() for worker in launcher.workers)
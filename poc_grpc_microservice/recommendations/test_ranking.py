@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from poc_grpc_microservice.recommendations.catalog import InMemoryCatalog
+from poc_grpc_microservice.recommendations.ranking import EmbeddingRanker
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, books_by_category
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BatchRecommendationRequest, RecommendationRequest
+
+
+def test_top_k_matches_full_sort():
+    ranker = EmbeddingRanker.random(num_users=5, books_per_category={0: 1000}, dim=8)
+    for user_id in range(5):
+        scores = ranker.book_embeddings_by_category[0] @ ranker.user_embeddings[user_id]
+        expected = np.argsort(-scores, kind="stable")[:10]
+        assert list(ranker.top_k(user_id, 0, 10)) == list(expected)
+
+
+def test_top_k_batch_matches_single_user(monkeypatch):
+    # Force several chunks to exercise the chunked matrix product.
+    monkeypatch.setattr("poc_grpc_microservice.recommendations.ranking.MAX_BATCH_SCORES", 500)
+    ranker = EmbeddingRanker.random(num_users=20, books_per_category={0: 100}, dim=8)
+    user_ids = [3, 7, 7, 19, 0]
+    batch = ranker.top_k_batch(user_ids, 0, 5)
+    assert batch.shape == (5, 5)
+    for user_id, positions in zip(user_ids, batch):
+        assert list(positions) == list(ranker.top_k(user_id, 0, 5))
+
+
+def test_top_k_larger_than_category():
+    ranker = EmbeddingRanker.random(num_users=1, books_per_category={0: 3}, dim=4)
+    assert sorted(ranker.top_k(0, 0, 10)) == [0, 1, 2]
+    assert ranker.top_k_batch([0], 0, 0).shape == (1, 0)
+    assert ranker.top_k_batch([0], 0, -1).shape == (1, 0)
+
+
+def test_save_and_load(tmp_path):
+    ranker = EmbeddingRanker.random(num_users=4, books_per_category={0: 6, 2: 3}, dim=4)
+    path = tmp_path / "embeddings.npz"
+    ranker.save(path)
+    loaded = EmbeddingRanker.load(path)
+    assert np.array_equal(loaded.user_embeddings, ranker.user_embeddings)
+    assert sorted(loaded.book_embeddings_by_category) == [0, 2]
+    assert list(loaded.top_k(1, 2, 2)) == list(ranker.top_k(1, 2, 2))
+
+
+def test_service_ranks_known_users():
+    ranker = EmbeddingRanker.random(num_users=2, books_per_category={
+        category: len(books) for category, books in books_by_category.items()
+    }, dim=4)
+    service = RecommendationService(InMemoryCatalog(books_by_category), ranker)
+    books = books_by_category[BookCategory.MYSTERY]
+    expected = [books[position].id for position in ranker.top_k(1, BookCategory.MYSTERY, 2)]
+
+    request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=2)
+    response = service.Recommend(request, context=None)
+    assert [book.id for book in response.recommendations] == expected
+
+    batch = service.BatchRecommend(BatchRecommendationRequest(requests=[
+        request,
+        RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=1),
+        RecommendationRequest(user_id=99, category=BookCategory.SELF_HELP, max_results=3),
+    ]), context=None)
+    assert [book.id for book in batch.responses[0].recommendations] == expected
+    assert [book.id for book in batch.responses[1].recommendations] == expected[:1]
+    assert len(batch.responses[2].recommendations) == 3
+
+
+def test_service_rejects_a_ranker_for_another_catalog():
+    catalog = InMemoryCatalog(books_by_category)
+    ranker = EmbeddingRanker.random(num_users=2, books_per_category={BookCategory.MYSTERY: 1000}, dim=4)
+    with pytest.raises(ValueError, match="1000 books"):
+        RecommendationService(catalog, ranker)
+    ranker = EmbeddingRanker.random(num_users=2, books_per_category={99: 3}, dim=4)
+    with pytest.raises(ValueError, match="not in the catalog"):
+        RecommendationService(catalog, ranker)
+
+
+def test_negative_max_results_returns_no_books():
+    service = RecommendationService(InMemoryCatalog(books_by_category), ranker=None)
+    for seed in (0, 1):
+        request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=-1, seed=seed)
+        assert list(service.Recommend(request, context=None).recommendations) == []
@@ -0,0 +1,91 @@
+import contextlib
+import grpc
+import pytest
+from concurrent import futures
+from poc_grpc_microservice.recommendations import recommendations
+from poc_grpc_microservice.recommendations.harness import running_async_server
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, books_by_category, create_server
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub, add_RecommendationsServicer_to_server
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BatchRecommendationRequest, RecommendationRequest
+
+
+@pytest.fixture(scope="module", params=["thread", "thread-cached", "aio-cached"])
+def client(request):
+    with contextlib.ExitStack() as stack:
+        if request.param == "aio-cached":
+            port = stack.enter_context(running_async_server())
+        else:
+            if request.param == "thread":
+                server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+                add_RecommendationsServicer_to_server(RecommendationService(), server)
+            else:
+                server = create_server(None)
+            port = server.add_insecure_port("localhost:0")
+            server.start()
+            stack.callback(server.stop, None)
+        channel = stack.enter_context(grpc.insecure_channel(f"localhost:{port}"))
+        grpc.channel_ready_future(channel).result(timeout=10)
+        yield RecommendationsStub(channel)
+
+
+def book_ids(category):
+    return {book.id for book in books_by_category[category]}
+
+
+def test_recommend(client):
+    request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=2)
+    response = client.Recommend(request)
+    assert len(response.recommendations) == 2
+    assert {book.id for book in response.recommendations} <= book_ids(BookCategory.MYSTERY)
+
+
+def test_batch_recommend(client):
+    categories = [BookCategory.MYSTERY, BookCategory.SCIENCE_FICTION, BookCategory.SELF_HELP]
+    request = BatchRecommendationRequest(requests=[
+        RecommendationRequest(user_id=user_id, category=category, max_results=3)
+        for user_id, category in enumerate(categories)
+    ])
+    response = client.BatchRecommend(request)
+    assert len(response.responses) == len(categories)
+    for category, category_response in zip(categories, response.responses):
+        assert {book.id for book in category_response.recommendations} == book_ids(category)
+
+
+def test_recommend_stream(client):
+    categories = [BookCategory.SELF_HELP, BookCategory.MYSTERY]
+    request = BatchRecommendationRequest(requests=[
+        RecommendationRequest(user_id=1, category=category, max_results=1)
+        for category in categories
+    ])
+    responses = list(client.RecommendStream(request))
+    assert len(responses) == len(categories)
+    for category, category_response in zip(categories, responses):
+        assert len(category_response.recommendations) == 1
+        assert category_response.recommendations[0].id in book_ids(category)
+
+
+def test_browse_category_streams_chunks(client, monkeypatch):
+    monkeypatch.setattr(recommendations, "BROWSE_CHUNK_SIZE", 2)
+    request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=3)
+    responses = list(client.BrowseCategory(request))
+    assert [len(response.recommendations) for response in responses] == [2, 1]
+    ids = {book.id for response in responses for book in response.recommendations}
+    assert ids == book_ids(BookCategory.MYSTERY)
+
+
+def test_batch_recommend_unknown_category(client):
+    request = BatchRecommendationRequest(requests=[
+        RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=1),
+        RecommendationRequest(user_id=1, category=42, max_results=1),
+    ])
+    with pytest.raises(grpc.RpcError) as error:
+        client.BatchRecommend(request)
+    assert error.value.code() == grpc.StatusCode.NOT_FOUND
+
+
+def test_recommend_with_seed_is_deterministic(client):
+    request = RecommendationRequest(user_id=1, category=BookCategory.SCIENCE_FICTION, max_results=2, seed=7)
+    first = client.Recommend(request)
+    assert len(first.recommendations) == 2
+    for _ in range(5):
+        assert client.Recommend(request) == first
@@ -0,0 +1,59 @@
+from poc_grpc_microservice.recommendations.catalog import InMemoryCatalog
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, books_by_category
+from poc_grpc_microservice.recommendations.response_cache import LRUCache, ResponseCache, encode_varint
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BookRecommendation, BatchRecommendationRequest, BatchRecommendationResponse, RecommendationRequest, RecommendationResponse
+
+
+def test_encode_varint():
+    assert encode_varint(0) == b"\x00"
+    assert encode_varint(127) == b"\x7f"
+    assert encode_varint(128) == b"\x80\x01"
+    assert encode_varint(300) == b"\xac\x02"
+
+
+def test_encoded_books_match_protobuf():
+    books = [
+        BookRecommendation(id=1, title="short"),
+        BookRecommendation(id=2, title="x" * 500),
+        BookRecommendation(id=3),
+    ]
+    cache = ResponseCache()
+    expected = RecommendationResponse(recommendations=books).SerializeToString()
+    assert cache.encode_books(books) == expected
+    # Second time round every book comes from the cache.
+    assert cache.encode_books(books) == expected
+
+
+def test_encoded_batch_matches_protobuf():
+    cache = ResponseCache()
+    responses = [books_by_category[category] for category in books_by_category] + [[]]
+    encoded = cache.encode_responses(cache.encode_books(books) for books in responses)
+    parsed = BatchRecommendationResponse.FromString(encoded)
+    assert [list(response.recommendations) for response in parsed.responses] == responses
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert len(cache) == 2
+
+
+def test_service_serves_seeded_responses_from_cache():
+    response_cache = ResponseCache()
+    service = RecommendationService(InMemoryCatalog(books_by_category), response_cache=response_cache)
+    request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=2, seed=3)
+    encoded = service.Recommend(request, context=None)
+    assert service.Recommend(request, context=None) is encoded
+    assert len(RecommendationResponse.FromString(encoded).recommendations) == 2
+
+    unseeded = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=2)
+    service.Recommend(unseeded, context=None)
+    assert len(response_cache._responses) == 1
+
+    batch = service.BatchRecommend(BatchRecommendationRequest(requests=[request, unseeded]), context=None)
+    assert len(BatchRecommendationResponse.FromString(batch).responses) == 2
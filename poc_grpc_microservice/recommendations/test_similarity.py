@@ -0,0 +1,92 @@
+import grpc
+import numpy as np
+import pytest
+from concurrent import futures
+from poc_grpc_microservice.recommendations.catalog import InMemoryCatalog
+from poc_grpc_microservice.recommendations.ranking import EmbeddingRanker
+from poc_grpc_microservice.recommendations.recommendations import RecommendationService, add_service_to_server, books_by_category
+from poc_grpc_microservice.recommendations.response_cache import ResponseCache
+from poc_grpc_microservice.recommendations.similarity import IVFIndex, build_from_ranker
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations_pb2 import SimilarBooksRequest
+
+
+def clustered_embeddings(num_books=2000, num_clusters=20, dim=16, seed=1):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((num_clusters, dim))
+    labels = rng.integers(num_clusters, size=num_books)
+    return (centers[labels] + 0.1 * rng.standard_normal((num_books, dim))).astype(np.float32)
+
+
+def build_index(embeddings):
+    num_books = len(embeddings)
+    return IVFIndex.build(
+        embeddings,
+        book_ids=np.arange(num_books) + 1000,
+        categories=np.zeros(num_books),
+        positions=np.arange(num_books),
+        num_lists=20,
+    )
+
+
+def test_search_recall_against_brute_force():
+    embeddings = clustered_embeddings()
+    index = build_index(embeddings)
+    normalized = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    hits = 0
+    for book in range(0, len(embeddings), 100):
+        exact = np.argsort(-(normalized @ normalized[book]))[1:11]
+        found = [position for _, position in index.similar(book + 1000, 10, nprobe=4)]
+        assert book not in found
+        hits += len(set(found) & set(exact))
+    assert hits / (20 * 10) > 0.9
+
+
+def test_unknown_book():
+    index = build_index(clustered_embeddings(num_books=100))
+    assert index.row(5) is None
+    with pytest.raises(KeyError):
+        index.similar(5, 3)
+
+
+def test_save_and_load(tmp_path):
+    index = build_index(clustered_embeddings(num_books=200))
+    path = tmp_path / "index.npz"
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == 200
+    assert loaded.similar(1010, 5) == index.similar(1010, 5)
+
+
+@pytest.fixture(scope="module")
+def client():
+    catalog = InMemoryCatalog(books_by_category)
+    ranker = EmbeddingRanker.random(num_users=1, books_per_category={
+        category: len(books) for category, books in books_by_category.items()
+    }, dim=4)
+    service = RecommendationService(
+        catalog, response_cache=ResponseCache(), similarity_index=build_from_ranker(ranker, catalog, num_lists=2)
+    )
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=2))
+    add_service_to_server(service, server)
+    port = server.add_insecure_port("localhost:0")
+    server.start()
+    channel = grpc.insecure_channel(f"localhost:{port}")
+    yield RecommendationsStub(channel)
+    channel.close()
+    server.stop(None)
+
+
+def test_similar_books_rpc(client):
+    response = client.SimilarBooks(SimilarBooksRequest(book_id=5, k=3))
+    ids = [book.id for book in response.recommendations]
+    assert len(ids) == 3
+    assert 5 not in ids
+    assert set(ids) <= set(range(1, 10))
+
+
+def test_similar_books_rpc_unknown_book(client):
+    with pytest.raises(grpc.RpcError) as error:
+        client.SimilarBooks(SimilarBooksRequest(book_id=42, k=3))
+    assert error.value.code() == grpc.StatusCode.NOT_FOUND
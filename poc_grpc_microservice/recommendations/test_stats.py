@@ -0,0 +1,88 @@
+import contextlib
+import grpc
+import pytest
+import requests
+from threading import Thread
+from poc_grpc_microservice.recommendations.recommendations import create_server
+from poc_grpc_microservice.recommendations.stats import MethodStats, ServerStats, start_stats_http_server
+from poc_grpc_microservice.recommendations.harness import running_async_server
+from poc_grpc_microservice.recommendations.recommendations_pb2_grpc import RecommendationsStub
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory, BatchRecommendationRequest, RecommendationRequest
+
+
+def test_percentiles():
+    method_stats = MethodStats()
+    for latency in [0.001] * 90 + [0.1] * 10:
+        method_stats.record(latency, "OK", 1, 2)
+    stats = method_stats.as_dict()
+    assert stats["count"] == 100
+    assert 1.0 <= stats["p50_ms"] < 1.2
+    assert 100 <= stats["p99_ms"] < 120
+    assert stats["request_bytes"] == 100
+    assert stats["status"] == {"OK": 100}
+
+
+def test_shards_are_merged():
+    stats = ServerStats()
+
+    def record():
+        for _ in range(100):
+            stats.finish("/m", stats.start("/m"), "OK", 0, 0)
+
+    threads = [Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.start("/m")
+    assert stats.snapshot()["/m"]["count"] == 400
+    assert stats.snapshot()["/m"]["in_flight"] == 1
+
+
+@pytest.mark.parametrize("mode", ["thread", "aio"])
+def test_interceptor_records_rpcs(mode):
+    stats = ServerStats()
+    with contextlib.ExitStack() as stack:
+        if mode == "thread":
+            server = create_server(None, stats=stats)
+            port = server.add_insecure_port("localhost:0")
+            server.start()
+            stack.callback(server.stop, None)
+        else:
+            port = stack.enter_context(running_async_server(stats=stats))
+
+        channel = stack.enter_context(grpc.insecure_channel(f"localhost:{port}"))
+        grpc.channel_ready_future(channel).result(timeout=10)
+        client = RecommendationsStub(channel)
+        request = RecommendationRequest(user_id=1, category=BookCategory.MYSTERY, max_results=2)
+        for _ in range(3):
+            client.Recommend(request)
+        with pytest.raises(grpc.RpcError):
+            client.Recommend(RecommendationRequest(user_id=1, category=42, max_results=2))
+        list(client.RecommendStream(BatchRecommendationRequest(requests=[request, request])))
+
+    snapshot = stats.snapshot()
+    recommend = snapshot["/Recommendations/Recommend"]
+    assert recommend["count"] == 4
+    assert recommend["in_flight"] == 0
+    assert recommend["status"] == {"OK": 3, "NOT_FOUND": 1}
+    assert recommend["request_bytes"] > 0
+    assert recommend["response_bytes"] > 0
+    assert recommend["p99_ms"] > 0
+    stream = snapshot["/Recommendations/RecommendStream"]
+    assert stream["status"] == {"OK": 1}
+    assert stream["response_bytes"] > 0
+
+
+def test_stats_http_endpoint():
+    stats = ServerStats()
+    stats.finish("/Recommendations/Recommend", stats.start("/Recommendations/Recommend"), "OK", 3, 4)
+    http_server = start_stats_http_server(stats, 0)
+    try:
+        url = f"http://localhost:{http_server.server_address[1]}"
+        rtn = requests.get(url=f"{url}/stats")
+        assert rtn.status_code == 200
+        assert rtn.json()["/Recommendations/Recommend"]["response_bytes"] == 4
+        assert requests.get(url=f"{url}/other").status_code == 404
+    finally:
+        http_server.shutdown()
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from poc_grpc_microservice import client
+from poc_grpc_microservice.recommendations.recommendations import create_server
+from poc_grpc_microservice.recommendations.harness import get_free_port
+from poc_grpc_microservice.recommendations.recommendations_pb2 import BookCategory
+
+
+@pytest.fixture(scope="module")
+def target():
+    port = get_free_port()
+    server = create_server(port)
+    server.start()
+    yield f"localhost:{port}"
+    server.stop(None)
+
+
+def test_parse_mix():
+    assert client.parse_mix("MYSTERY:3, SELF_HELP") == [(BookCategory.MYSTERY, 3.0), (BookCategory.SELF_HELP, 1.0)]
+
+
+def test_request_generator_follows_mix():
+    requests = client.request_generator([(BookCategory.SELF_HELP, 1)], max_results=2, num_users=5)
+    for _ in range(20):
+        request = next(requests)
+        assert request.category == BookCategory.SELF_HELP
+        assert request.max_results == 2
+        assert 1 <= request.user_id <= 5
+
+
+@pytest.mark.parametrize("mode", ["closed", "open"])
+def test_load_run_reports_percentiles(target, mode):
+    args = client.parse_args([
+        "--target", target, "--mode", mode, "--qps", "200", "--duration", "0.5", "--warmup", "0.1",
+    ])
+    result = asyncio.run(client.run(args))
+    assert result["requests"] > 0
+    assert result["errors"] == {}
+    assert 0 < result["p50_ms"] <= result["p99_ms"] <= result["max_ms"]
+    if mode == "open":
+        assert result["requests"] == pytest.approx(100, abs=5)
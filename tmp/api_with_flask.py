@@ -1,6 +1,10 @@
+import json
+import os
+import uuid
 import flask
 from flask import jsonify, request
 from flask import render_template
+from tmp.avengers_store import AvengersStore, SQLiteAvengersStore, validate
 
 
 app = flask.Flask(__name__)
@@ -34,7 +38,20 @@ lapras = {
     "superpower":"n"
 }
 
-avengers =[aladdin, elpis, lapras]
+
+def create_store():
+    # AVENGERS_STORE=sqlite keeps the data in AVENGERS_DB across restarts;
+    # the default is the in-memory store.
+    if os.getenv("AVENGERS_STORE", "memory") == "sqlite":
+        store = SQLiteAvengersStore(os.getenv("AVENGERS_DB", "avengers.db"))
+        if len(store) == 0:
+            for avenger in (aladdin, elpis, lapras):
+                store.insert(avenger)
+        return store
+    return AvengersStore([aladdin, elpis, lapras])
+
+
+avengers = create_store()
 
 
 @app.route('/', methods=['GET'])
@@ -47,40 +64,187 @@ def template_home():
     return render_template('upload_sample.txt')
 
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+
+def query_int(name, default=None, minimum=0):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        flask.abort(400, f"{name} must be an integer")
+    if value < minimum:
+        flask.abort(400, f"{name} must be at least {minimum}")
+    return value
+
+
+def generate_all(store, batch_size):
+    # Walks the store one page at a time, so memory does not grow with it.
+    after = None
+    while True:
+        records, after = store.page(after, batch_size)
+        yield from records
+        if after is None:
+            return
+
+
+def stream_json_array(records):
+    yield "["
+    for index, record in enumerate(records):
+        yield ("," if index else "") + app.json.dumps(record)
+    yield "]"
+
+
+def stream_ndjson(records):
+    for record in records:
+        yield app.json.dumps(record) + "\n"
+
+
+# Versions restart with the process, so ETags carry a per-process token.
+ETAG_PREFIX = uuid.uuid4().hex[:8]
+# (store, etag, serialized body) of the latest version served, replaced as
+# a whole so readers never see a body paired with the wrong tag.
+_cached_all = (None, None, None)
+
+
+def serialized_all(store):
+    global _cached_all
+    # The version is read before the records: a body may then be newer than
+    # its tag, which costs an extra 200 later, but never older.
+    etag = f"{ETAG_PREFIX}-{store.version}"
+    cached_store, cached_etag, body = _cached_all
+    if cached_store is not store or cached_etag != etag:
+        body = jsonify(store.all()).get_data()
+        _cached_all = (store, etag, body)
+    return etag, body
+
+
 @app.route('/get/avengers/all', methods=['GET'])
 def avengers_all():
-    return jsonify(avengers)
+    # ?stream=json or ?stream=ndjson writes the whole collection from a
+    # generator; ?after=<cursor>&limit=<n> returns one page and the cursor
+    # of the next; without either the whole list is returned at once.
+    stream = request.args.get('stream')
+    if stream == 'json':
+        records = generate_all(avengers, STREAM_BATCH_SIZE)
+        return flask.Response(stream_json_array(records), mimetype='application/json')
+    if stream == 'ndjson':
+        records = generate_all(avengers, STREAM_BATCH_SIZE)
+        return flask.Response(stream_ndjson(records), mimetype='application/x-ndjson')
+    if stream is not None:
+        flask.abort(400, "stream must be json or ndjson")
+
+    if 'after' in request.args or 'limit' in request.args:
+        limit = min(query_int('limit', DEFAULT_PAGE_SIZE, minimum=1), MAX_PAGE_SIZE)
+        records, next_after = avengers.page(query_int('after'), limit)
+        return jsonify({"avengers": records, "next": next_after})
+
+    # Pollers send the ETag back in If-None-Match and get a 304 while
+    # nothing was written.
+    etag, body = serialized_all(avengers)
+    response = flask.Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 
 @app.route('/get/avengers', methods=['GET'])
 def avengers_properties():
-    results = []
-    nationality = ""
-    if 'nationality' in request.args:
-        nationality = request.args['nationality']
-    else:
-        print("no hero")    
+    # Every query parameter is a field to match, e.g.
+    # ?nationality=American&gender=F
+    criteria = request.args.to_dict()
+    if not criteria:
+        print("no hero")
+
+    return jsonify(avengers.find(criteria))
 
-    for avenger in avengers:
-        if avenger['nationality'] == nationality:
-            results.append(avenger)
 
-    return jsonify(results)
+@app.route('/get/avengers/stats', methods=['GET'])
+def avengers_stats():
+    # ?group_by=nationality,gender -> avengers per (nationality, gender).
+    # The counts are kept up to date on insert, nothing is scanned here.
+    fields = [field.strip() for field in request.args.get('group_by', '').split(',') if field.strip()]
+    try:
+        counts = avengers.group_counts(fields)
+    except ValueError as error:
+        flask.abort(400, str(error))
+    return jsonify({"group_by": fields, "counts": counts})
 
 
 @app.route('/post/avengers', methods=['POST'])
 def create_avengers():
-    request_data = request.get_json()
-    leader = request_data['Leader']
-    gender = request_data['gender']
+    request_data = request.get_json(silent=True)
+    if not isinstance(request_data, dict):
+        flask.abort(400, "Body must be a JSON object")
     new_avenger = {
-        "Leader": leader, 
-        "gender": gender, 
+        field: request_data[field] for field in ("Leader", "gender") if field in request_data
     }
-    avengers.append(new_avenger)
+    try:
+        validate(new_avenger)
+    except ValueError as error:
+        flask.abort(400, str(error))
+    avengers.insert(new_avenger)
     return jsonify(new_avenger)
 
 
+BULK_BATCH_SIZE = 1000
+# Longest NDJSON line read; longer ones are skipped and reported.
+MAX_LINE_BYTES = 64 * 1024
+# Errors listed in a bulk response; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+def read_lines(stream, max_bytes):
+    """Lines of ``stream``, each read with at most ``max_bytes``; a longer
+    line is skipped to its end and yielded as None."""
+    while True:
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        if len(line) <= max_bytes or line.endswith(b"\n"):
+            yield line
+            continue
+        while line and not line.endswith(b"\n"):
+            line = stream.readline(max_bytes)
+        yield None
+
+
+@app.route('/post/avengers/bulk', methods=['POST'])
+def create_avengers_bulk():
+    # One JSON object per line (NDJSON). The body is read line by line from
+    # the request stream, so a large upload is never held in memory at once.
+    inserted = 0
+    errors = []
+    error_count = 0
+    batch = []
+    for line_number, line in enumerate(read_lines(request.stream, MAX_LINE_BYTES), start=1):
+        if line is not None and not line.strip():
+            continue
+        try:
+            if line is None:
+                raise ValueError(f"Line is longer than {MAX_LINE_BYTES} bytes")
+            record = json.loads(line)
+            validate(record)
+        except (ValueError, RecursionError) as error:
+            # RecursionError comes from deeply nested JSON such as [[[[...
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"line": line_number, "error": str(error)})
+            continue
+        batch.append(record)
+        if len(batch) >= BULK_BATCH_SIZE:
+            avengers.insert_many(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        avengers.insert_many(batch)
+        inserted += len(batch)
+    return jsonify({"inserted": inserted, "error_count": error_count, "errors": errors})
+
+
 def init_api():
     app.run(debug=False, use_reloader=False)
 
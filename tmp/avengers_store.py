@@ -0,0 +1,456 @@
+import array
+import bisect
+import itertools
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+from collections import Counter
+
+
+# Columns of the SQLite store, each with its own index. The declared types
+# make SQLite compare ``id`` numerically with string query parameters.
+COLUMN_TYPES = {
+    "id": "INTEGER",
+    "Leader": "TEXT",
+    "nickname": "TEXT",
+    "nationality": "TEXT",
+    "gender": "TEXT",
+    "superpower": "TEXT",
+}
+FIELDS = tuple(COLUMN_TYPES)
+REQUIRED_FIELDS = ("Leader", "gender")
+# Fields with few distinct values, stored in memory as small integer codes.
+DICTIONARY_ENCODED = ("nationality", "gender", "superpower")
+# Fields stats can be grouped by. A count is kept for every combination of
+# them, so only low-cardinality fields belong here.
+GROUP_BY_FIELDS = DICTIONARY_ENCODED
+COLUMNS = ", ".join(f'"{field}"' for field in FIELDS)
+SELECT_ALL = f"SELECT {COLUMNS} FROM avengers ORDER BY position"
+SELECT_PAGE = f"SELECT position, {COLUMNS} FROM avengers WHERE position > ? ORDER BY position LIMIT ?"
+INSERT = f"INSERT INTO avengers ({COLUMNS}) VALUES ({', '.join('?' for _ in FIELDS)})"
+ADD_COUNT = (
+    "INSERT INTO avenger_counts (group_by, key, count) VALUES (?, ?, ?) "
+    "ON CONFLICT (group_by, key) DO UPDATE SET count = count + excluded.count"
+)
+
+
+def check_known_fields(record):
+    unknown = set(record) - set(FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+
+def validate(record):
+    """Raise ValueError unless ``record`` is an avenger the stores accept."""
+    if not isinstance(record, dict):
+        raise ValueError("Record is not a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if field not in record]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    check_known_fields(record)
+    for field, value in record.items():
+        expected = int if COLUMN_TYPES[field] == "INTEGER" else str
+        if type(value) is not expected:
+            raise ValueError(f"{field} must be a {'number' if expected is int else 'string'}")
+
+
+def canonical_group(fields):
+    """``fields`` in the order counts are kept in; ValueError unless they
+    are distinct fields of ``GROUP_BY_FIELDS``."""
+    unknown = [field for field in fields if field not in GROUP_BY_FIELDS]
+    if unknown:
+        raise ValueError(f"Cannot group by: {', '.join(unknown)}")
+    if not fields or len(set(fields)) != len(fields):
+        raise ValueError("group_by needs distinct fields")
+    return tuple(sorted(fields, key=GROUP_BY_FIELDS.index))
+
+
+def group_keys(record):
+    """``(group, values)`` of every group ``record`` counts towards."""
+    for size in range(1, len(GROUP_BY_FIELDS) + 1):
+        for group in itertools.combinations(GROUP_BY_FIELDS, size):
+            yield group, tuple(record.get(field) for field in group)
+
+
+def hashable_group_keys(record):
+    """``group_keys(record)`` as a list, or ValueError if a value cannot
+    key a counter."""
+    keys = list(group_keys(record))
+    for group, values in keys:
+        try:
+            hash(values)
+        except TypeError:
+            raise ValueError(f"{', '.join(group)} must be single values") from None
+    return keys
+
+
+def group_rows(fields, group, counts):
+    """Rows of ``{field: value, ..., "count": n}`` with the fields in the
+    order they were asked for, largest groups first."""
+    rows = []
+    for values, count in counts.items():
+        row = dict(zip(group, values))
+        row = {field: row[field] for field in fields}
+        row["count"] = count
+        rows.append(row)
+    rows.sort(key=lambda row: (-row["count"], json.dumps(row)))
+    return rows
+
+
+class AvengersStore(object):
+    """Avenger records stored column by column, with a hash index on every
+    field.
+
+    Fields in ``DICTIONARY_ENCODED`` keep one small integer code per record
+    into a table of their few distinct values; other fields keep a plain
+    list. Records are rebuilt as dicts when read, so callers see the same
+    records they inserted.
+
+    Each index maps a value to the positions of the records holding it (a
+    posting list; a lone position is stored as a bare int). ``find``
+    intersects the posting lists of all criteria, walking the shortest and
+    binary-searching the others, so a lookup costs about O(shortest list)
+    instead of a full scan. Values are indexed as strings because query
+    parameters always are.
+
+    Reads never lock. Columns and posting lists are only ever appended to,
+    so a ``Snapshot`` is just the record count, version and column list at
+    one moment: everything below that count is immutable. Writers are
+    serialized by a lock, append, then publish a new snapshot with one
+    attribute assignment, which makes a whole ``insert_many`` batch visible
+    at once. ``version`` goes up with every write.
+
+    Counts per group of ``GROUP_BY_FIELDS`` are updated on insert. They are
+    small, so each batch copies the count tables it touches and publishes
+    them with the snapshot.
+    """
+
+    def __init__(self, records=()):
+        self._indexes = {}
+        self._write_lock = threading.Lock()
+        self._snapshot = Snapshot(0, 0, (), self._indexes, {})
+        self.insert_many(records)
+
+    def snapshot(self):
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def __len__(self):
+        return len(self._snapshot)
+
+    def all(self):
+        return self._snapshot.all()
+
+    def page(self, after=None, limit=100):
+        return self._snapshot.page(after, limit)
+
+    def find(self, criteria):
+        return self._snapshot.find(criteria)
+
+    def group_counts(self, fields):
+        return self._snapshot.group_counts(fields)
+
+    def insert(self, record):
+        self.insert_many([record])
+        return record
+
+    def insert_many(self, records):
+        # Anything that can fail runs before the shared columns and posting
+        # lists change, so a rejected batch leaves no partial write behind.
+        batch = [(record, hashable_group_keys(record)) for record in map(encodable, records)]
+        with self._write_lock:
+            snapshot = self._snapshot
+            count, version, columns = snapshot.count, snapshot.version, snapshot.columns
+            group_counts = dict(snapshot.group_counts_by_group)
+            copied = set()
+            known = {field for field, _ in columns}
+            for record, keys in batch:
+                new_fields = [field for field in record if field not in known]
+                if new_fields:
+                    # Readers hold the old tuple, so adding a column never
+                    # changes what they iterate over.
+                    columns += tuple(
+                        (field, new_column(field, count)) for field in new_fields
+                    )
+                    known.update(new_fields)
+                for field, column in columns:
+                    column.append(record.get(field, MISSING))
+                for field, value in record.items():
+                    add_posting(self._indexes.setdefault(field, {}), str(value), count)
+                for group, values in keys:
+                    if group not in copied:
+                        group_counts[group] = Counter(group_counts.get(group, ()))
+                        copied.add(group)
+                    group_counts[group][values] += 1
+                count += 1
+                version += 1
+            self._snapshot = Snapshot(count, version, columns, self._indexes, group_counts)
+
+
+# Marks a field a record does not have.
+MISSING = object()
+
+
+def encodable(record):
+    """``record``, or ValueError if the in-memory store cannot hold it."""
+    if not isinstance(record, dict):
+        raise ValueError("Record is not a JSON object")
+    for field in DICTIONARY_ENCODED:
+        try:
+            hash(record.get(field))
+        except TypeError:
+            raise ValueError(f"{field} must be a single value") from None
+    return record
+
+
+def new_column(field, count):
+    if field in DICTIONARY_ENCODED:
+        return DictionaryColumn(count)
+    return [MISSING] * count
+
+
+class DictionaryColumn(object):
+    """Column of a few distinct values stored as codes into ``values``.
+
+    Codes take one byte per record and widen to two, then four, bytes when
+    a column has more distinct values than fit.
+    """
+
+    def __init__(self, count=0):
+        self.values = [MISSING]
+        self.codes_by_value = {}
+        self.codes = array.array("B", bytes(count))
+
+    def __getitem__(self, position):
+        return self.values[self.codes[position]]
+
+    def append(self, value):
+        if value is MISSING:
+            self.codes.append(0)
+            return
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = self.codes_by_value[value] = len(self.values)
+            self.values.append(value)
+            if code >= 1 << (8 * self.codes.itemsize):
+                self.codes = array.array("H" if self.codes.itemsize == 1 else "I", self.codes)
+        self.codes.append(code)
+
+
+def add_posting(index, key, position):
+    posting = index.get(key)
+    if posting is None:
+        index[key] = position
+    elif isinstance(posting, int):
+        index[key] = array.array("q", (posting, position))
+    else:
+        posting.append(position)
+
+
+class Snapshot(object):
+    """Read-only view of the first ``count`` records of an AvengersStore."""
+
+    def __init__(self, count, version, columns, indexes, group_counts_by_group):
+        self.count = count
+        self.version = version
+        self.columns = columns
+        self.indexes = indexes
+        self.group_counts_by_group = group_counts_by_group
+
+    def __len__(self):
+        return self.count
+
+    def record(self, position):
+        record = {}
+        for field, column in self.columns:
+            value = column[position]
+            if value is not MISSING:
+                record[field] = value
+        return record
+
+    def all(self):
+        return [self.record(position) for position in range(self.count)]
+
+    def page(self, after=None, limit=100):
+        """Up to ``limit`` records after the cursor ``after`` and the cursor
+        of the next page, or None after the last one. Cursors are insertion
+        positions, so pages stay stable while records are added."""
+        start = 0 if after is None else after + 1
+        records = [self.record(position) for position in range(start, min(start + limit, self.count))]
+        return records, (start + limit - 1 if records and len(records) == limit else None)
+
+    def find(self, criteria):
+        """Records matching every ``field: value`` of ``criteria``, in
+        insertion order. No criteria matches nothing."""
+        postings = []
+        for field, value in criteria.items():
+            posting = self.indexes.get(field, {}).get(str(value))
+            if isinstance(posting, int):
+                posting = (posting,)
+            # Positions are appended in order, so the part of a posting list
+            # inside this snapshot is a prefix.
+            end = bisect.bisect_left(posting, self.count) if posting else 0
+            if not end:
+                return []
+            postings.append((end, posting))
+        if not postings:
+            return []
+        postings.sort(key=lambda posting: posting[0])
+        (end, shortest), others = postings[0], postings[1:]
+        return [
+            self.record(position) for position in shortest[:end]
+            if all(contains(other, other_end, position) for other_end, other in others)
+        ]
+
+    def group_counts(self, fields):
+        """Number of avengers per distinct combination of ``fields``."""
+        group = canonical_group(fields)
+        return group_rows(fields, group, self.group_counts_by_group.get(group, {}))
+
+
+def contains(posting, end, position):
+    index = bisect.bisect_left(posting, position, 0, end)
+    return index < end and posting[index] == position
+
+
+class SQLiteAvengersStore(object):
+    """Same interface as ``AvengersStore``, persisted in a SQLite file.
+
+    The database runs in WAL mode so readers never block the writer. Every
+    field in ``FIELDS`` is an indexed column; fields a record does not have
+    are NULL and left out again when it is read back. Calls check out one
+    of at most ``pool_size`` connections shared by all threads, so a server
+    starting a thread per request does not open a connection per request.
+    Each connection's statement cache keeps the fixed, parameterised
+    queries below prepared. Group counts live in their own table, updated
+    in the same transaction as the inserts.
+    """
+
+    def __init__(self, path, records=(), pool_size=8):
+        self.path = path
+        self.pool_size = pool_size
+        self._idle = queue.Queue()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        with self._checkout() as connection, connection:
+            columns = ", ".join(f'"{field}" {column_type}' for field, column_type in COLUMN_TYPES.items())
+            connection.execute(f"CREATE TABLE IF NOT EXISTS avengers (position INTEGER PRIMARY KEY, {columns})")
+            for field in FIELDS:
+                connection.execute(f'CREATE INDEX IF NOT EXISTS avengers_{field} ON avengers ("{field}")')
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS avenger_counts "
+                "(group_by TEXT, key TEXT, count INTEGER, PRIMARY KEY (group_by, key)) WITHOUT ROWID"
+            )
+            counted = connection.execute("SELECT count(*) FROM avenger_counts").fetchone()[0]
+            if not counted:
+                # A database from before the counts table: count it once.
+                self._add_counts(connection, self._records(connection.execute(SELECT_ALL)))
+        records = list(records)
+        if records:
+            self.insert_many(records)
+
+    def _open(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints and stays durable
+        # against application crashes.
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextlib.contextmanager
+    def _checkout(self):
+        """An idle connection, a new one while fewer than ``pool_size`` are
+        open, or else the next one to be returned."""
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._connections_lock:
+                connection = None
+                if len(self._connections) < self.pool_size:
+                    connection = self._open()
+                    self._connections.append(connection)
+            if connection is None:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def _query(self, sql, parameters=()):
+        with self._checkout() as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def __len__(self):
+        return self._query("SELECT count(*) FROM avengers")[0][0]
+
+    @property
+    def version(self):
+        # Records are only ever added, so the last position changes with
+        # every write, survives restarts and is shared by all connections.
+        return self._query("SELECT max(position) FROM avengers")[0][0] or 0
+
+    def all(self):
+        return self._records(self._query(SELECT_ALL))
+
+    def page(self, after=None, limit=100):
+        rows = self._query(SELECT_PAGE, (after if after is not None else 0, limit))
+        next_after = rows[-1][0] if rows and len(rows) == limit else None
+        return self._records(row[1:] for row in rows), next_after
+
+    def insert(self, record):
+        self.insert_many([record])
+        return record
+
+    def insert_many(self, records):
+        """Insert ``records`` in one transaction."""
+        # Read three times below, so a generator must be materialized first.
+        records = list(records)
+        for record in records:
+            check_known_fields(record)
+        with self._checkout() as connection, connection:
+            connection.executemany(INSERT, ([record.get(field) for field in FIELDS] for record in records))
+            self._add_counts(connection, records)
+
+    @staticmethod
+    def _add_counts(connection, records):
+        counts = Counter(group_key for record in records for group_key in group_keys(record))
+        connection.executemany(ADD_COUNT, (
+            (",".join(group), json.dumps(values), count)
+            for (group, values), count in counts.items()
+        ))
+
+    def group_counts(self, fields):
+        group = canonical_group(fields)
+        rows = self._query("SELECT key, count FROM avenger_counts WHERE group_by = ?", (",".join(group),))
+        return group_rows(fields, group, {tuple(json.loads(key)): count for key, count in rows})
+
+    def find(self, criteria):
+        if not criteria or not set(criteria) <= set(FIELDS):
+            return []
+        fields = sorted(criteria)
+        where = " AND ".join(f'"{field}" = ?' for field in fields)
+        rows = self._query(
+            f"SELECT {COLUMNS} FROM avengers WHERE {where} ORDER BY position",
+            [str(criteria[field]) for field in fields],
+        )
+        return self._records(rows)
+
+    @staticmethod
+    def _records(rows):
+        return [
+            {field: value for field, value in zip(FIELDS, row) if value is not None}
+            for row in rows
+        ]
+
+    def close(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._idle = queue.Queue()
+
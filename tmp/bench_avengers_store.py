@@ -0,0 +1,83 @@
+"""Compare write and read throughput of the in-memory and SQLite avenger stores.
+
+    python -m tmp.bench_avengers_store --records 100000 --threads 4
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent import futures
+from tmp.avengers_store import AvengersStore, SQLiteAvengersStore
+
+
+NATIONALITIES = ["American", "Russia", "British", "Wakanda", "Asgard", "Canadian", "German", "Sokovia"]
+
+
+def make_records(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "Leader": f"leader {i}",
+            "nickname": f"hero {i}",
+            "nationality": rng.choice(NATIONALITIES),
+            "gender": rng.choice("MF"),
+            "superpower": rng.choice("yn"),
+        }
+        for i in range(count)
+    ]
+
+
+def throughput(store, records, reads, threads):
+    started = time.perf_counter()
+    for record in records:
+        store.insert(record)
+    writes_per_s = len(records) / (time.perf_counter() - started)
+
+    rng = random.Random(1)
+    ids = [str(rng.randrange(len(records))) for _ in range(reads)]
+    with futures.ThreadPoolExecutor(threads) as pool:
+        started = time.perf_counter()
+        found = sum(pool.map(lambda id_: len(store.find({"id": id_})), ids))
+        point_reads_per_s = reads / (time.perf_counter() - started)
+        assert found == reads
+
+        criteria = [
+            {"nationality": rng.choice(NATIONALITIES), "gender": rng.choice("MF"), "superpower": "y"}
+            for _ in range(max(1, reads // 100))
+        ]
+        started = time.perf_counter()
+        list(pool.map(store.find, criteria))
+        filter_reads_per_s = len(criteria) / (time.perf_counter() - started)
+
+    return {
+        "writes_per_s": round(writes_per_s, 1),
+        "point_reads_per_s": round(point_reads_per_s, 1),
+        "filter_reads_per_s": round(filter_reads_per_s, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--reads", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    result = {"records": args.records, "threads": args.threads}
+    result["memory"] = throughput(AvengersStore(), records, args.reads, args.threads)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteAvengersStore(os.path.join(directory, "avengers.db"))
+        try:
+            result["sqlite"] = throughput(store, records, args.reads, args.threads)
+        finally:
+            store.close()
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure bytes per record of the columnar store against a list of dicts.
+
+    python -m tmp.bench_store_memory --records 1000000
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+from tmp.avengers_store import AvengersStore
+from tmp.bench_avengers_store import NATIONALITIES
+
+
+def generate_records(count):
+    # Built one at a time so the input never counts towards the store size.
+    for i in range(count):
+        yield {
+            "id": i,
+            "Leader": f"leader {i}",
+            "nickname": f"hero {i}",
+            "nationality": NATIONALITIES[i % len(NATIONALITIES)],
+            "gender": "MF"[i % 2],
+            "superpower": "yn"[i % 3 == 0],
+        }
+
+
+def traced():
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    dicts = list(generate_records(args.records))
+    dicts_size = traced()
+    expected = json.dumps(dicts[:1000], sort_keys=True)
+    del dicts
+    baseline = traced()
+
+    store = AvengersStore()
+    batch = []
+    for record in generate_records(args.records):
+        batch.append(record)
+        if len(batch) == 10_000:
+            store.insert_many(batch)
+            batch = []
+    store.insert_many(batch)
+    del batch, record
+    store_size = traced() - baseline
+    same_json = json.dumps(store.page(limit=1000)[0], sort_keys=True) == expected
+    # Dropping the indexes leaves the columns alone.
+    store._indexes.clear()
+    columns_size = traced() - baseline
+    tracemalloc.stop()
+
+    result = {
+        "records": args.records,
+        "dicts_bytes_per_record": round(dicts_size / args.records, 1),
+        "columns_bytes_per_record": round(columns_size / args.records, 1),
+        "store_with_indexes_bytes_per_record": round(store_size / args.records, 1),
+        "same_json": same_json,
+    }
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
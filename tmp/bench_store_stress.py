@@ -0,0 +1,103 @@
+"""Stress the avenger stores with concurrent readers and writers.
+
+Writer threads insert batches while reader threads run filtered lookups
+and pages. Every read is checked against the invariant the writers keep
+(each batch holds as many F as M avengers), so a torn read shows up as an
+inconsistency instead of passing silently.
+
+    python -m tmp.bench_store_stress --readers 8 --writers 2 --duration 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from tmp.avengers_store import AvengersStore, SQLiteAvengersStore
+from tmp.bench_avengers_store import NATIONALITIES
+
+
+def make_batch(writer, batch):
+    return [
+        {
+            "Leader": f"leader {writer}-{batch}-{gender}",
+            "nationality": NATIONALITIES[batch % len(NATIONALITIES)],
+            "gender": gender,
+            "superpower": "y",
+        }
+        for gender in "MF"
+    ]
+
+
+def stress(store, readers, writers, duration):
+    deadline = time.perf_counter() + duration
+    counts = {"reads": 0, "writes": 0, "inconsistent": 0, "errors": 0}
+    counts_lock = threading.Lock()
+
+    def count(name, value=1):
+        with counts_lock:
+            counts[name] += value
+
+    def write(writer):
+        batch = 0
+        while time.perf_counter() < deadline:
+            store.insert_many(make_batch(writer, batch))
+            batch += 1
+        count("writes", 2 * batch)
+
+    def read(reader):
+        reads = 0
+        nationality = NATIONALITIES[reader % len(NATIONALITIES)]
+        while time.perf_counter() < deadline:
+            try:
+                males = store.find({"nationality": nationality, "gender": "M"})
+                females = store.find({"nationality": nationality, "gender": "F"})
+                store.page(limit=100)
+            except Exception:
+                count("errors")
+                continue
+            # The female list is read after the male one, so it can only be
+            # longer if a batch landed in between.
+            if len(females) < len(males) or any(avenger["gender"] != "F" for avenger in females):
+                count("inconsistent")
+            reads += 3
+        count("reads", reads)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read, args=(i,)) for i in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "reads_per_s": round(counts["reads"] / elapsed, 1),
+        "writes_per_s": round(counts["writes"] / elapsed, 1),
+        "inconsistent": counts["inconsistent"],
+        "errors": counts["errors"],
+        "records": len(store),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    result = {"readers": args.readers, "writers": args.writers}
+    result["memory"] = stress(AvengersStore(), args.readers, args.writers, args.duration)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteAvengersStore(os.path.join(directory, "avengers.db"))
+        try:
+            result["sqlite"] = stress(store, args.readers, args.writers, args.duration)
+        finally:
+            store.close()
+    print(json.dumps(result))
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import logging
 import json
+import socket
+import time
 import requests
 import pytest
 from threading import Thread
 from tmp import api_with_flask
+from tmp.avengers_store import AvengersStore
 
 
 @pytest.fixture(scope="module", autouse=True)
@@ -13,6 +16,18 @@ def setup():
     mock_server_thread = Thread(target=api_with_flask.init_api)
     mock_server_thread.setDaemon(True)
     mock_server_thread.start()
+    wait_for_server('localhost', 5000)
+
+
+def wait_for_server(host, port, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f'server on {host}:{port} did not start')
 
 
 def test_avengers_all_with_get_method():
@@ -53,4 +68,108 @@ def test_avengers_all_with_get_method():
 def test_avengers_all_with_post_method():
     rtn = requests.post(url='http://localhost:5000/get/avengers/all')
     print(f'status code: {rtn.status_code}')
-    assert rtn.status_code == 405
\ No newline at end of file
+    assert rtn.status_code == 405
+
+
+def test_avengers_filtered_by_several_fields():
+    rtn = requests.get(url='http://localhost:5000/get/avengers?nationality=American&superpower=y')
+    assert rtn.status_code == 200
+    assert [avenger['Leader'] for avenger in json.loads(rtn.content)] == ['Peter']
+
+
+def test_bulk_ingest_reports_bad_lines(monkeypatch):
+    monkeypatch.setattr(api_with_flask, 'avengers', AvengersStore())
+    monkeypatch.setattr(api_with_flask, 'BULK_BATCH_SIZE', 2)
+    body = '\n'.join([
+        '{"Leader": "Steve", "gender": "M", "nationality": "American"}',
+        '{"Leader": "Wanda"}',
+        'not json',
+        '',
+        '{"Leader": "Carol", "gender": "F", "nationality": "American"}',
+        '{"Leader": "Thor", "gender": "M", "planet": "Asgard"}',
+        '{"Leader": "Bucky", "gender": "M", "id": "4"}',
+        '{"Leader": "Sam", "gender": "M"}',
+    ])
+    rtn = api_with_flask.app.test_client().post('/post/avengers/bulk', data=body)
+    assert rtn.status_code == 200
+    summary = rtn.get_json()
+    assert summary['inserted'] == 3
+    assert summary['error_count'] == 4
+    assert [error['line'] for error in summary['errors']] == [2, 3, 6, 7]
+    assert summary['errors'][0]['error'] == 'Missing fields: gender'
+    assert [avenger['Leader'] for avenger in api_with_flask.avengers.all()] == ['Steve', 'Carol', 'Sam']
+
+
+def test_bulk_ingest_reports_nested_and_long_lines(monkeypatch):
+    monkeypatch.setattr(api_with_flask, 'avengers', AvengersStore())
+    monkeypatch.setattr(api_with_flask, 'MAX_LINE_BYTES', 10000)
+    body = '\n'.join([
+        '[' * 4000 + ']' * 4000,
+        '{"Leader": "' + 'x' * 20000 + '", "gender": "M"}',
+        '{"Leader": "Sam", "gender": "M"}',
+    ])
+    rtn = api_with_flask.app.test_client().post('/post/avengers/bulk', data=body)
+    assert rtn.status_code == 200
+    summary = rtn.get_json()
+    assert summary['inserted'] == 1
+    assert [error['line'] for error in summary['errors']] == [1, 2]
+    assert summary['errors'][1]['error'] == 'Line is longer than 10000 bytes'
+    assert [avenger['Leader'] for avenger in api_with_flask.avengers.all()] == ['Sam']
+
+
+def test_avengers_all_pages_and_streams(monkeypatch):
+    records = [{'Leader': f'leader {i}', 'gender': 'F'} for i in range(5)]
+    monkeypatch.setattr(api_with_flask, 'avengers', AvengersStore(records))
+    monkeypatch.setattr(api_with_flask, 'STREAM_BATCH_SIZE', 2)
+    client = api_with_flask.app.test_client()
+
+    page = client.get('/get/avengers/all?limit=3').get_json()
+    assert page['avengers'] == records[:3]
+    page = client.get(f"/get/avengers/all?after={page['next']}&limit=3").get_json()
+    assert page == {'avengers': records[3:], 'next': None}
+    assert client.get('/get/avengers/all?limit=0').status_code == 400
+
+    assert json.loads(client.get('/get/avengers/all?stream=json').data) == records
+    lines = client.get('/get/avengers/all?stream=ndjson').data.decode().splitlines()
+    assert [json.loads(line) for line in lines] == records
+
+
+def test_avengers_all_answers_if_none_match_with_304(monkeypatch):
+    monkeypatch.setattr(api_with_flask, 'avengers', AvengersStore([{'Leader': 'Tony', 'gender': 'M'}]))
+    client = api_with_flask.app.test_client()
+
+    first = client.get('/get/avengers/all')
+    etag = first.headers['ETag']
+    assert client.get('/get/avengers/all', headers={'If-None-Match': etag}).status_code == 304
+
+    api_with_flask.avengers.insert({'Leader': 'Carol', 'gender': 'F'})
+    changed = client.get('/get/avengers/all', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert [avenger['Leader'] for avenger in changed.get_json()] == ['Tony', 'Carol']
+
+
+def test_avengers_stats():
+    rtn = requests.get(url='http://localhost:5000/get/avengers/stats?group_by=nationality,superpower')
+    assert rtn.status_code == 200
+    assert json.loads(rtn.content) == {
+        'group_by': ['nationality', 'superpower'],
+        'counts': [
+            {'nationality': 'American', 'superpower': 'n', 'count': 1},
+            {'nationality': 'American', 'superpower': 'y', 'count': 1},
+            {'nationality': 'Russia', 'superpower': 'n', 'count': 1},
+        ],
+    }
+    assert requests.get(url='http://localhost:5000/get/avengers/stats?group_by=Leader').status_code == 400
+
+
+def test_create_avengers_rejects_invalid_records(monkeypatch):
+    monkeypatch.setattr(api_with_flask, 'avengers', AvengersStore())
+    client = api_with_flask.app.test_client()
+    assert client.post('/post/avengers', json={'Leader': 'X', 'gender': ['F']}).status_code == 400
+    assert client.post('/post/avengers', json={'Leader': 'X'}).status_code == 400
+    assert client.post('/post/avengers', data='not json').status_code == 400
+
+    rtn = client.post('/post/avengers', json={'Leader': 'Y', 'gender': 'F', 'planet': 'Earth'})
+    assert rtn.get_json() == {'Leader': 'Y', 'gender': 'F'}
+    assert api_with_flask.avengers.find({'Leader': 'Y'}) == [{'Leader': 'Y', 'gender': 'F'}]
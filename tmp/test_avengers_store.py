@@ -0,0 +1,203 @@
+import threading
+import pytest
+from tmp.avengers_store import AvengersStore, SQLiteAvengersStore
+
+
+RECORDS = [
+    {"id": 1, "Leader": "Tony", "nationality": "American", "gender": "M"},
+    {"id": 2, "Leader": "Peter", "nationality": "American", "gender": "M"},
+    {"id": 3, "Leader": "Natasha", "nationality": "Russia", "gender": "F"},
+    {"id": 4, "Leader": "Carol", "nationality": "American", "gender": "F"},
+]
+
+
+def test_find_intersects_every_field():
+    store = AvengersStore(RECORDS)
+    assert store.find({"nationality": "American"}) == [RECORDS[0], RECORDS[1], RECORDS[3]]
+    assert store.find({"nationality": "American", "gender": "F"}) == [RECORDS[3]]
+    assert store.find({"id": "3"}) == [RECORDS[2]]
+
+
+def test_find_without_matches():
+    store = AvengersStore(RECORDS)
+    assert store.find({}) == []
+    assert store.find({"nationality": "Wakanda"}) == []
+    assert store.find({"nationality": "Russia", "gender": "M"}) == []
+    assert store.find({"planet": "Earth"}) == []
+
+
+def test_insert_updates_the_indexes():
+    store = AvengersStore(RECORDS)
+    version = store.version
+    new_avenger = store.insert({"Leader": "Wanda", "gender": "F"})
+    assert len(store) == 5
+    assert store.version > version
+    assert store.find({"gender": "F"}) == [RECORDS[2], RECORDS[3], new_avenger]
+    assert store.find({"Leader": "Wanda"}) == [new_avenger]
+
+
+def test_sqlite_store_matches_the_in_memory_store(tmp_path):
+    store = SQLiteAvengersStore(str(tmp_path / "avengers.db"), RECORDS)
+    try:
+        assert store.all() == RECORDS
+        assert store.find({"nationality": "American", "gender": "F"}) == [RECORDS[3]]
+        assert store.find({"id": "3"}) == [RECORDS[2]]
+        assert store.find({"planet": "Earth"}) == []
+        version = store.version
+        new_avenger = store.insert({"Leader": "Wanda", "gender": "F"})
+        assert store.version > version
+        assert store.find({"gender": "F"}) == [RECORDS[2], RECORDS[3], new_avenger]
+    finally:
+        store.close()
+
+    reopened = SQLiteAvengersStore(str(tmp_path / "avengers.db"))
+    try:
+        assert len(reopened) == 5
+        assert reopened.all()[-1] == {"Leader": "Wanda", "gender": "F"}
+    finally:
+        reopened.close()
+
+
+def test_pages_follow_the_cursor(tmp_path):
+    sqlite_store = SQLiteAvengersStore(str(tmp_path / "avengers.db"), RECORDS)
+    try:
+        for store in (AvengersStore(RECORDS), sqlite_store):
+            first, after = store.page(limit=3)
+            assert first == RECORDS[:3]
+            second, after = store.page(after, limit=3)
+            assert second == RECORDS[3:]
+            assert after is None
+
+            _, after = store.page(limit=2)
+            second, after = store.page(after, limit=2)
+            assert second == RECORDS[2:]
+            assert store.page(after, limit=2) == ([], None)
+    finally:
+        sqlite_store.close()
+
+
+def test_snapshot_does_not_see_later_writes():
+    store = AvengersStore(RECORDS)
+    snapshot = store.snapshot()
+    store.insert_many([{"Leader": "Wanda", "gender": "F"}, {"Leader": "Sam", "gender": "M"}])
+    assert len(snapshot) == 4
+    assert snapshot.all() == RECORDS
+    assert snapshot.find({"gender": "F"}) == [RECORDS[2], RECORDS[3]]
+    assert snapshot.page(limit=10) == (RECORDS, None)
+    assert len(store) == 6
+    assert store.version == snapshot.version + 2
+
+
+def test_readers_see_whole_batches_while_writers_insert():
+    store = AvengersStore()
+    errors = []
+
+    def write():
+        for batch in range(200):
+            store.insert_many([{"Leader": f"{batch}", "gender": gender} for gender in "MF"])
+
+    def read():
+        try:
+            for _ in range(500):
+                snapshot = store.snapshot()
+                females = snapshot.find({"gender": "F"})
+                assert len(snapshot) == 2 * len(females)
+                assert all(avenger["gender"] == "F" for avenger in females)
+        except AssertionError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store) == 400
+
+
+def test_columnar_records_read_back_unchanged():
+    records = [
+        {"id": i, "Leader": f"leader {i}", "nationality": f"country {i}", "gender": "MF"[i % 2]}
+        for i in range(300)
+    ]
+    records[7] = {"Leader": "Wanda", "gender": "F"}
+    store = AvengersStore(records)
+    assert store.all() == records
+    assert store.find({"nationality": "country 299"}) == [records[299]]
+    assert store.find({"Leader": "Wanda", "gender": "F"}) == [records[7]]
+    assert store.find({"id": "7"}) == []
+
+
+def test_group_counts_follow_inserts(tmp_path):
+    sqlite_store = SQLiteAvengersStore(str(tmp_path / "avengers.db"), RECORDS)
+    try:
+        for store in (AvengersStore(RECORDS), sqlite_store):
+            assert store.group_counts(["gender", "nationality"]) == [
+                {"gender": "M", "nationality": "American", "count": 2},
+                {"gender": "F", "nationality": "American", "count": 1},
+                {"gender": "F", "nationality": "Russia", "count": 1},
+            ]
+            store.insert({"Leader": "Wanda", "gender": "F"})
+            assert store.group_counts(["gender"]) == [
+                {"gender": "F", "count": 3},
+                {"gender": "M", "count": 2},
+            ]
+            assert {"nationality": None, "count": 1} in store.group_counts(["nationality"])
+    finally:
+        sqlite_store.close()
+
+
+def test_sqlite_store_reuses_a_bounded_pool_of_connections(tmp_path):
+    store = SQLiteAvengersStore(str(tmp_path / "avengers.db"), RECORDS, pool_size=2)
+    try:
+        # A threaded server runs every request on a new thread.
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(store.find({"gender": "F"})))
+            for _ in range(50)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [[RECORDS[2], RECORDS[3]]] * 50
+        assert len(store._connections) <= 2
+    finally:
+        store.close()
+
+
+def test_stores_accept_generators(tmp_path):
+    sqlite_store = SQLiteAvengersStore(str(tmp_path / "avengers.db"), (record for record in RECORDS[:2]))
+    try:
+        for store in (AvengersStore(record for record in RECORDS[:2]), sqlite_store):
+            store.insert_many(record for record in RECORDS[2:])
+            assert store.all() == RECORDS
+            assert {"gender": "F", "count": 2} in store.group_counts(["gender"])
+    finally:
+        sqlite_store.close()
+
+
+def test_rejected_batch_leaves_the_store_unchanged():
+    store = AvengersStore(RECORDS)
+    version = store.version
+    with pytest.raises(ValueError, match="gender must be a single value"):
+        store.insert_many([{"Leader": "X", "gender": "F"}, {"Leader": "Y", "gender": ["F"]}])
+    assert store.version == version
+    assert store.all() == RECORDS
+
+    new_avenger = store.insert({"Leader": "Z", "gender": "F"})
+    assert store.all() == RECORDS + [new_avenger]
+    assert store.find({"Leader": "Z"}) == [new_avenger]
+    assert store.find({"Leader": "X"}) == []
+
+
+def test_unhashable_group_values_are_rejected_before_writing(monkeypatch):
+    # Group counts must not rely on the columns having checked the values.
+    monkeypatch.setattr("tmp.avengers_store.DICTIONARY_ENCODED", ())
+    store = AvengersStore(RECORDS)
+    with pytest.raises(ValueError):
+        store.insert({"Leader": "X", "gender": "F", "nationality": ["Wakanda"]})
+    assert store.all() == RECORDS
+    assert store.find({"Leader": "X"}) == []
+    new_avenger = store.insert({"Leader": "Y", "gender": "F"})
+    assert store.all() == RECORDS + [new_avenger]